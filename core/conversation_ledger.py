@@ -1,3 +1,5 @@
+import heapq
+import logging
 import time
 import threading
 import sqlite3
@@ -5,11 +7,15 @@ import aiohttp
 import io
 import base64
 import os
+import re
+import sys
 from PIL import Image
+from itertools import islice, repeat
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 from urllib.parse import unquote, urlparse
 from . import utils
+from .rw_lock import ReadWriteLock
 
 # 条件导入：当缺少astrbot依赖时使用Mock
 try:
@@ -19,6 +25,19 @@ except ImportError:
     logger = logging.getLogger(__name__)
 
 
+# Token 估算按中文计权的字符：CJK 统一汉字 + 常见中文标点（沿用原逐字符判断的集合）
+_CHINESE_TOKEN_CHARS = re.compile('[\u4e00-\u9fff，。！？；："（）【】《》]')
+
+
+# 在大量消息间高度重复的短字符串字段：入账时驻留，同值只存一份
+_INTERNED_MESSAGE_FIELDS = ("chat_id", "role", "sender_id", "sender_name", "kind")
+
+
+def _timestamp_key(message: Dict) -> float:
+    """账本排序键：模块级复用，避免每次插入/排序都新建 lambda。"""
+    return message.get("timestamp", 0)
+
+
 class ConversationLedger:
     """
     对话总账 - 插件内部权威的、唯一的对话记录中心。
@@ -26,7 +45,8 @@ class ConversationLedger:
     """
     def __init__(self, config_manager, data_dir: Path, astr_context=None):
         import bisect
-        self._lock = threading.Lock()
+        # 账本读写锁：快照/统计等只读路径共享，入账/整理等写路径独占
+        self._lock = ReadWriteLock()
         # 专用于数据库操作的锁，保护并发访问 SQLite
         self._db_lock = threading.Lock()
         # 每个 chat_id 对应一个独立的账本
@@ -48,7 +68,8 @@ class ConversationLedger:
         # 缓存 bisect 模块
         self._bisect = bisect
 
-        # 每个会话的最后压缩时间戳 {chat_id: timestamp}
+        # 每个会话的最后压缩时刻 {chat_id: time.monotonic()}
+        # 只用于计算间隔，取单调时钟，不受系统校时回拨/跳变影响
         self._last_compression_time: Dict[str, float] = {}
         # 压缩锁：整理期间互斥，防止半成品外泄
         self._compression_locks: Dict[str, threading.Lock] = {}
@@ -239,11 +260,18 @@ class ConversationLedger:
 
     def _get_or_create_ledger(self, chat_id: str) -> Dict:
         """获取或创建指定会话的账本。"""
+        # 热路径：已登记的会话直接取，不抢全局写锁（单次 dict 读取本身原子）
+        ledger = self._ledgers.get(chat_id)
+        if ledger is not None and chat_id in self._compression_locks:
+            return ledger
+
         with self._lock:
             if chat_id not in self._ledgers:
                 self._ledgers[chat_id] = {
                     "messages": [],
                     "current_summary": "",  # 当前摘要（正式上下文前缀）
+                    "token_estimate": 0,  # Token 估算缓存，None 表示待重算
+                    "version": 0,  # 消息表版本，每次写入递增，供整理发布时校验
                 }
             else:
                 self._ledgers[chat_id].setdefault("current_summary", "")
@@ -258,8 +286,8 @@ class ConversationLedger:
 
     def get_current_summary(self, chat_id: str) -> str:
         ledger = self._get_or_create_ledger(chat_id)
-        with self._lock:
-            return str(ledger.get("current_summary") or "")
+        # 摘要只会被整体替换为新字符串，单次取值即一致快照，无需读锁
+        return str(ledger.get("current_summary") or "")
 
     def set_current_summary(self, chat_id: str, summary: str) -> None:
         ledger = self._get_or_create_ledger(chat_id)
@@ -331,6 +359,13 @@ class ConversationLedger:
             "timestamp": max(0.0, float(timestamp) - 0.001),
         }
 
+    def _messages_since(self, messages: List[Dict], timestamp: float) -> List[Dict]:
+        """返回时间戳不早于 timestamp 的后缀切片。
+
+        账本消息按时间戳升序，二分定位起点：O(log n) 定位 + O(k) 复制。
+        """
+        return messages[self._bisect.bisect_left(messages, timestamp, key=_timestamp_key):]
+
     def add_message(self, chat_id: str, message: Dict, should_prune: bool = False):
         """
         向指定会话添加一条新消息。
@@ -358,29 +393,59 @@ class ConversationLedger:
         if not messages:
             return
 
-        # 1. 同一把锁内写完整批，读者要么全见要么全不见
+        # 1. 锁外完成逐条规范化与 Token 计数（消息尚未入账，无人可见）
+        batch_tokens = 0
+        batch_in_order = True
+        previous_timestamp = None
+        for message in messages:
+            # is_processed 已退役，写入时清理旧字段
+            message.pop("is_processed", None)
+            if "chat_id" not in message:
+                message["chat_id"] = chat_id
+            for field in _INTERNED_MESSAGE_FIELDS:
+                value = message.get(field)
+                if type(value) is str:
+                    message[field] = sys.intern(value)
+
+            # 入口统一为 float 秒：账本内时间戳同一数值类型，比较不混型
+            if type(message.get("timestamp")) is int:
+                message["timestamp"] = float(message["timestamp"])
+            timestamp = _timestamp_key(message)
+            if previous_timestamp is not None and timestamp < previous_timestamp:
+                batch_in_order = False
+            previous_timestamp = timestamp
+            batch_tokens += self._count_message_tokens(message)
+
+        # 2. 同一把锁内写完整批，读者要么全见要么全不见
         ledger = self._get_or_create_ledger(chat_id)
         with self._lock:
-            for message in messages:
-                # is_processed 已退役，写入时清理旧字段
-                message.pop("is_processed", None)
-                if "chat_id" not in message:
-                    message["chat_id"] = chat_id
-
-                # 使用 bisect.insort 在排序位置插入，避免全量排序
-                self._bisect.insort(
-                    ledger["messages"],
-                    message,
-                    key=lambda m: m.get("timestamp", 0),
-                )
+            ledger_messages = ledger["messages"]
+            if batch_in_order and (
+                not ledger_messages
+                or _timestamp_key(ledger_messages[-1]) <= _timestamp_key(messages[0])
+            ):
+                # 常见情况：整批按时间顺序接在末尾，一次 extend
+                ledger_messages.extend(messages)
+            elif len(messages) == 1:
+                self._bisect.insort(ledger_messages, messages[0], key=_timestamp_key)
+            else:
+                # 乱序批次：追加后整体稳定排序（两段有序归并），
+                # 等价于逐条 insort，但不必每条都搬移一次尾部
+                ledger_messages.extend(messages)
+                ledger_messages.sort(key=_timestamp_key)
+
+            ledger["version"] = ledger.get("version", 0) + 1
+            # Token 估算已有缓存时只累加新消息，避免每次入账全表重算
+            if ledger.get("token_estimate") is not None:
+                ledger["token_estimate"] += batch_tokens
 
-        # 2. 判断是否需要压缩/整理
+        # 3. 判断是否需要压缩/整理
         # 私聊：留给上层主动 LLM 摘要，不在入库同步路径里抢先规则收口
         # 群聊：规则整理（整批只整理一次）
         if self._should_compress(chat_id) and not self._is_private_chat_id(chat_id):
             self.organize_context(chat_id, mode="group_rule")
 
-        # 3. 检查并限制总消息数量
+        # 4. 检查并限制总消息数量
         self._enforce_total_message_limit()
 
     def get_all_messages(self, chat_id: str) -> List[Dict]:
@@ -395,12 +460,35 @@ class ConversationLedger:
         """
         ledger = self._get_or_create_ledger(chat_id)
         should_cleanup_cache = False
-        with self._lock:
+        with self._lock.read():
             return ledger["messages"].copy()  # 返回副本避免外部修改
 
+    def get_messages_through(
+        self, chat_id: str, boundary_message_id: str = ""
+    ) -> List[Dict]:
+        """
+        获取截至边界消息（包含）的消息副本。
+
+        在锁内先定位边界再切片，只复制需要的前缀，
+        不再先整表复制、再由调用方二次切片。
+
+        Args:
+            chat_id: 会话ID
+            boundary_message_id: 边界消息ID；为空时返回全部消息
+
+        Returns:
+            消息列表；找不到边界时返回空列表（拒绝扩窗）
+        """
+        ledger = self._get_or_create_ledger(chat_id)
+        with self._lock.read():
+            messages = ledger["messages"]
+            if not boundary_message_id:
+                return messages.copy()
+            return utils.slice_messages_through_id(messages, boundary_message_id)
+
     def get_all_chat_ids(self) -> List[str]:
         """返回已知会话 ID 列表（有消息记录或摘要的会话）。"""
-        with self._lock:
+        with self._lock.read():
             return [
                 chat_id
                 for chat_id, ledger in self._ledgers.items()
@@ -412,13 +500,19 @@ class ConversationLedger:
         设置指定会话的消息列表。
         注意：这会完全替换现有的消息列表。
 
+        账本消息始终按时间戳升序，按时间的查找依赖这一点做二分；
+        这里排序兜底（已排序的输入只需一趟线性扫描）。
+
         Args:
             chat_id: 会话ID
             messages: 新的消息列表
         """
         ledger = self._get_or_create_ledger(chat_id)
         with self._lock:
-            ledger["messages"] = messages.copy()  # 保存副本避免外部修改
+            # sorted 同时产生副本，避免外部修改
+            ledger["messages"] = sorted(messages, key=_timestamp_key)
+            ledger["token_estimate"] = None
+            ledger["version"] = ledger.get("version", 0) + 1
 
     def get_context_snapshot(
         self, chat_id: str, boundary_message_id: str = ""
@@ -429,7 +523,7 @@ class ConversationLedger:
     def get_formal_context(self, chat_id: str) -> List[Dict]:
         """正式上下文：当前摘要 + 当前连续消息块。"""
         ledger = self._get_or_create_ledger(chat_id)
-        with self._lock:
+        with self._lock.read():
             summary = str(ledger.get("current_summary") or "").strip()
             messages = [m.copy() for m in ledger.get("messages", [])]
         if not summary:
@@ -613,96 +707,139 @@ class ConversationLedger:
             f"{body}"
         )
 
-    def _rule_organize(
+    def _plan_rule_organize(
         self,
-        chat_id: str,
+        messages: List[Dict],
+        old_summary: str,
         *,
         keep_tools: bool,
         keep_from_timestamp: float | None = None,
-        reason: str = "rule",
-    ) -> bool:
-        ledger = self._get_or_create_ledger(chat_id)
-        with self._lock:
-            messages = list(ledger.get("messages") or [])
-            old_summary = str(ledger.get("current_summary") or "")
-            if not messages:
-                return False
-
-            content_budget = self.config_manager.context_content_retain_tokens
-            tool_budget = self.config_manager.context_tool_retain_tokens if keep_tools else 0
+    ) -> Optional[Tuple[List[Dict], str]]:
+        """按预算计算规则整理结果（保留块, 新摘要），无需整理时返回 None。
 
-            retained_content = []
-            content_used = 0
-            for msg in reversed(messages):
-                if self._is_tool_message(msg):
-                    continue
-                if keep_from_timestamp is not None and msg.get("timestamp", 0) < keep_from_timestamp:
-                    # 入场整理：触发点之前不进当前块
+        只读输入，不触碰账本，可在锁外执行。
+        """
+        content_budget = self.config_manager.context_content_retain_tokens
+        tool_budget = self.config_manager.context_tool_retain_tokens if keep_tools else 0
+
+        # 入场整理：触发点之前不进当前块
+        candidates = messages
+        if keep_from_timestamp is not None:
+            candidates = self._messages_since(messages, keep_from_timestamp)
+
+        retained_content = []
+        content_used = 0
+        for msg in reversed(candidates):
+            if self._is_tool_message(msg):
+                continue
+            tokens = self._count_message_tokens(msg)
+            if content_used + tokens <= content_budget or len(retained_content) < self.MIN_RETAIN_COUNT:
+                retained_content.append(msg)
+                content_used += tokens
+            else:
+                break
+        retained_content.reverse()
+
+        retained_tools = []
+        tool_used = 0
+        if keep_tools:
+            for msg in reversed(candidates):
+                if not self._is_tool_message(msg):
                     continue
                 tokens = self._count_message_tokens(msg)
-                if content_used + tokens <= content_budget or len(retained_content) < self.MIN_RETAIN_COUNT:
-                    retained_content.append(msg)
-                    content_used += tokens
+                if tool_used + tokens <= tool_budget:
+                    retained_tools.append(msg)
+                    tool_used += tokens
                 else:
                     break
-            retained_content.reverse()
-
-            retained_tools = []
-            tool_used = 0
+            retained_tools.reverse()
+
+        retained = retained_content + retained_tools
+        retained.sort(key=_timestamp_key)
+        # 有明确 keep_from 时，不回退成“最近 N 条”，避免把入场前历史再带回来
+        if (
+            keep_from_timestamp is None
+            and len(retained) < self.MIN_RETAIN_COUNT
+            and len(messages) >= self.MIN_RETAIN_COUNT
+        ):
             if keep_tools:
-                for msg in reversed(messages):
-                    if not self._is_tool_message(msg):
-                        continue
-                    if keep_from_timestamp is not None and msg.get("timestamp", 0) < keep_from_timestamp:
-                        continue
-                    tokens = self._count_message_tokens(msg)
-                    if tool_used + tokens <= tool_budget:
-                        retained_tools.append(msg)
-                        tool_used += tokens
-                    else:
-                        break
-                retained_tools.reverse()
-
-            retained = retained_content + retained_tools
-            retained.sort(key=lambda m: m.get("timestamp", 0))
-            # 有明确 keep_from 时，不回退成“最近 N 条”，避免把入场前历史再带回来
-            if (
-                keep_from_timestamp is None
-                and len(retained) < self.MIN_RETAIN_COUNT
-                and len(messages) >= self.MIN_RETAIN_COUNT
-            ):
-                if keep_tools:
-                    retained = messages[-self.MIN_RETAIN_COUNT :]
-                else:
-                    # 群聊不记工具：fallback 也只取非 tool
-                    non_tools = [m for m in messages if not self._is_tool_message(m)]
-                    retained = (
-                        non_tools[-self.MIN_RETAIN_COUNT :]
-                        if non_tools
-                        else []
-                    )
+                retained = messages[-self.MIN_RETAIN_COUNT :]
+            else:
+                # 群聊不记工具：fallback 也只取非 tool
+                non_tools = [m for m in messages if not self._is_tool_message(m)]
+                retained = (
+                    non_tools[-self.MIN_RETAIN_COUNT :]
+                    if non_tools
+                    else []
+                )
 
-            retained_ids = {id(m) for m in retained}
-            discarded = [m for m in messages if id(m) not in retained_ids]
+        retained_ids = {id(m) for m in retained}
+        discarded = [m for m in messages if id(m) not in retained_ids]
 
-            if not discarded and not old_summary:
+        if not discarded and not old_summary:
+            return None
+
+        summary = self._build_rule_summary(old_summary, discarded, keep_tools=keep_tools)
+        # 去掉旧摘要消息，避免重复
+        retained = [
+            m
+            for m in retained
+            if m.get("kind")
+            not in ("context_summary", "summary_context", "context_compaction")
+        ]
+        if summary:
+            ts = retained[0].get("timestamp", time.time()) if retained else time.time()
+            retained = [self._make_summary_message(summary, ts)] + retained
+        return retained, summary
+
+    def _rule_organize(
+        self,
+        chat_id: str,
+        *,
+        keep_tools: bool,
+        keep_from_timestamp: float | None = None,
+        reason: str = "rule",
+    ) -> bool:
+        ledger = self._get_or_create_ledger(chat_id)
+        # 读-算-发布：读锁下取快照，锁外做 Token 预算与摘要拼装，
+        # 写锁内只做版本校验与整表替换，整理期间不阻塞读者和入账。
+        # 转述/过期标记会原地改写消息字典，快照逐条浅拷贝，锁外计算不与之共享
+        with self._lock.read():
+            messages = [dict(m) for m in (ledger.get("messages") or [])]
+            old_summary = str(ledger.get("current_summary") or "")
+            version = ledger.get("version", 0)
+        if not messages:
+            return False
+        plan = self._plan_rule_organize(
+            messages,
+            old_summary,
+            keep_tools=keep_tools,
+            keep_from_timestamp=keep_from_timestamp,
+        )
+
+        with self._lock:
+            if ledger.get("version", 0) != version:
+                # 计算期间账本有新写入：基于最新内容在写锁内重算一次，保证前进
+                messages = list(ledger.get("messages") or [])
+                old_summary = str(ledger.get("current_summary") or "")
+                if not messages:
+                    return False
+                plan = self._plan_rule_organize(
+                    messages,
+                    old_summary,
+                    keep_tools=keep_tools,
+                    keep_from_timestamp=keep_from_timestamp,
+                )
+            if plan is None:
                 return False
 
-            summary = self._build_rule_summary(old_summary, discarded, keep_tools=keep_tools)
-            ledger["current_summary"] = summary
-            # 去掉旧摘要消息，避免重复
-            retained = [
-                m
-                for m in retained
-                if m.get("kind")
-                not in ("context_summary", "summary_context", "context_compaction")
-            ]
-            if summary:
-                ts = retained[0].get("timestamp", time.time()) if retained else time.time()
-                retained = [self._make_summary_message(summary, ts)] + retained
+            retained, summary = plan
             original = len(messages)
+            ledger["current_summary"] = summary
             ledger["messages"] = retained
-            self._last_compression_time[chat_id] = time.time()
+            ledger["token_estimate"] = None
+            ledger["version"] = ledger.get("version", 0) + 1
+            self._last_compression_time[chat_id] = time.monotonic()
             logger.info(
                 f"AngelHeart[{chat_id}]: 上下文整理完成({reason}) "
                 f"{original} -> {len(retained)}，摘要长度={len(summary)}"
@@ -731,23 +868,35 @@ class ConversationLedger:
 
         ledger = self._get_or_create_ledger(chat_id)
         with self._lock:
-            messages = list(ledger.get("messages") or [])
+            # 各分支只访问需要保留的尾部区间，不再先整表过滤出非摘要消息
+            messages = ledger.get("messages") or []
             summary_kinds = ("context_summary", "summary_context", "context_compaction")
-            base_messages = [m for m in messages if m.get("kind") not in summary_kinds]
 
             if keep_count is not None:
                 # 私聊 LLM 摘要：保留尾部 N 条，避免 timestamp 下界误捞
                 n = max(0, int(keep_count))
-                retained = base_messages[-n:] if n else []
+                retained = []
+                if n:
+                    for msg in reversed(messages):
+                        if msg.get("kind") in summary_kinds:
+                            continue
+                        retained.append(msg)
+                        if len(retained) >= n:
+                            break
+                    retained.reverse()
             elif keep_from_timestamp is not None:
                 retained = [
-                    m for m in base_messages if m.get("timestamp", 0) >= keep_from_timestamp
+                    m
+                    for m in self._messages_since(messages, keep_from_timestamp)
+                    if m.get("kind") not in summary_kinds
                 ]
             else:
                 content_budget = self.config_manager.context_content_retain_tokens
                 retained = []
                 used = 0
-                for msg in reversed(base_messages):
+                for msg in reversed(messages):
+                    if msg.get("kind") in summary_kinds:
+                        continue
                     if not keep_tools and self._is_tool_message(msg):
                         continue
                     tokens = self._count_message_tokens(msg)
@@ -761,7 +910,9 @@ class ConversationLedger:
             ts = retained[0].get("timestamp", time.time()) if retained else time.time()
             ledger["current_summary"] = summary_text
             ledger["messages"] = [self._make_summary_message(summary_text, ts)] + retained
-            self._last_compression_time[chat_id] = time.time()
+            ledger["token_estimate"] = None
+            ledger["version"] = ledger.get("version", 0) + 1
+            self._last_compression_time[chat_id] = time.monotonic()
             logger.info(
                 f"AngelHeart[{chat_id}]: 摘要提交完成({reason}) "
                 f"保留 {len(retained)} 条，摘要长度={len(summary_text)}"
@@ -816,7 +967,7 @@ class ConversationLedger:
 
     def _collect_referenced_cache_paths(self, chat_id: str = "") -> set[str]:
         """从当前账本收集仍被引用的插件媒体缓存路径。"""
-        with self._lock:
+        with self._lock.read():
             if chat_id:
                 ledger = self._ledgers.get(chat_id)
                 messages = list(ledger["messages"]) if ledger else []
@@ -852,65 +1003,38 @@ class ConversationLedger:
     def _enforce_total_message_limit(self):
         """强制执行总消息数量限制。
         如果超过限制，从最旧的消息开始删除。
+
+        总数按会话逐个取 len，O(会话数)；只有超限时才多路归并各会话
+        （均按时间升序）取出全局最旧的超额条数，不再展开并排序全部消息。
         """
+        # 常见情况未超限：无锁预检即可返回。list() 一次性取出值快照，
+        # 不会因并发新建会话报“字典大小变化”；计数偏差由写锁内复核兜底
+        total_messages = sum(len(d["messages"]) for d in list(self._ledgers.values()))
+        if total_messages <= self.TOTAL_MESSAGE_LIMIT:
+            return
+
         affected_chat_ids = []
         with self._lock:
-            # 计算当前总消息数
-            total_messages = 0
-            all_messages_with_info = []
-
-            for chat_id, ledger_data in self._ledgers.items():
-                for msg in ledger_data["messages"]:
-                    all_messages_with_info.append((msg["timestamp"], chat_id, msg))
-                    total_messages += 1
-
-            # 如果超过总限制，删除最旧的消息
-            if total_messages > self.TOTAL_MESSAGE_LIMIT:
-                # 按时间戳排序（升序，最旧的在前）
-                all_messages_with_info.sort(key=lambda x: x[0])
-
-                # 计算需要删除多少条消息
-                excess_count = total_messages - self.TOTAL_MESSAGE_LIMIT
-
-                # 创建一个字典来跟踪每个会话需要删除的消息
-                messages_to_remove = {}
-                for i in range(excess_count):
-                    timestamp, chat_id, msg = all_messages_with_info[i]
-                    if chat_id not in messages_to_remove:
-                        messages_to_remove[chat_id] = []
-                    messages_to_remove[chat_id].append(msg)
-
-                # 从每个会话中删除对应的消息
-                for chat_id, msgs_to_remove in messages_to_remove.items():
-                    if chat_id in self._ledgers:
-                        ledger_data = self._ledgers[chat_id]
-                        # 从消息列表中删除需要移除的消息
-                        original_messages = ledger_data["messages"]
-                        # 使用消息的内存id或其他唯一标识来删除特定消息
-                        # 由于消息是字典，我们基于时间戳和内容来识别
-                        new_messages = []
-                        msgs_to_remove_copy = msgs_to_remove.copy()
-
-                        for msg in original_messages:
-                            # 检查是否是要删除的消息
-                            msg_to_remove_idx = -1
-                            for i, msg_to_remove in enumerate(msgs_to_remove_copy):
-                                # 比较时间戳和内容来确定是否是同一消息
-                                if (msg["timestamp"] == msg_to_remove["timestamp"] and
-                                    msg.get("content") == msg_to_remove.get("content") and
-                                    msg.get("role") == msg_to_remove.get("role")):
-                                    msg_to_remove_idx = i
-                                    break
-
-                            if msg_to_remove_idx != -1:
-                                # 这是要删除的消息，从待删除列表中移除
-                                msgs_to_remove_copy.pop(msg_to_remove_idx)
-                            else:
-                                # 保留这条消息
-                                new_messages.append(msg)
-
-                        ledger_data["messages"] = new_messages
-                        affected_chat_ids.append(chat_id)
+            # 持写锁后重新计数，期间可能已被其他线程裁剪
+            total_messages = sum(len(d["messages"]) for d in self._ledgers.values())
+            excess_count = total_messages - self.TOTAL_MESSAGE_LIMIT
+            if excess_count > 0:
+                # 每个会话一路 (时间戳, chat_id)，堆归并只推进到第 excess_count 条
+                streams = [
+                    zip(map(_timestamp_key, ledger_data["messages"]), repeat(chat_id))
+                    for chat_id, ledger_data in self._ledgers.items()
+                ]
+                remove_counts: Dict[str, int] = {}
+                for _, chat_id in islice(heapq.merge(*streams), excess_count):
+                    remove_counts[chat_id] = remove_counts.get(chat_id, 0) + 1
+
+                # 各会话消息按时间戳升序，全局最旧的若干条在每个会话里恰为前缀
+                for chat_id, count in remove_counts.items():
+                    ledger_data = self._ledgers[chat_id]
+                    del ledger_data["messages"][:count]
+                    ledger_data["token_estimate"] = None
+                    ledger_data["version"] = ledger_data.get("version", 0) + 1
+                    affected_chat_ids.append(chat_id)
 
         for chat_id in affected_chat_ids:
             self._cleanup_unreferenced_media_cache(chat_id)
@@ -929,10 +1053,20 @@ class ConversationLedger:
         """
         ledger = self._get_or_create_ledger(chat_id)
         with self._lock:
-            # 查找对应时间戳的消息
-            for message in ledger["messages"]:
+            # 账本按时间戳升序：二分定位到容差窗口起点，只检查窗口内的消息
+            messages = ledger["messages"]
+            start = self._bisect.bisect_right(
+                messages, message_timestamp - 0.001, key=_timestamp_key
+            )
+            for index in range(start, len(messages)):
+                message = messages[index]
+                if _timestamp_key(message) - message_timestamp >= 0.001:
+                    break
                 if abs(message.get("timestamp", 0) - message_timestamp) < 0.001:  # 处理浮点数精度
                     message["image_caption"] = caption
+                    # 原地改写消息：与其他改写路径一致，作废估算缓存并递增版本
+                    ledger["token_estimate"] = None
+                    ledger["version"] = ledger.get("version", 0) + 1
                     image_refs = self._extract_image_refs_from_content(message.get("content"))
                     if image_refs:
                         message["image_refs"] = image_refs
@@ -997,7 +1131,7 @@ class ConversationLedger:
         """返回当前会话账本中已登记的图片引用。"""
         ledger = self._get_or_create_ledger(chat_id)
         refs: set[str] = set()
-        with self._lock:
+        with self._lock.read():
             for message in ledger["messages"]:
                 content = message.get("content", [])
                 if isinstance(content, list):
@@ -1124,6 +1258,9 @@ class ConversationLedger:
                             expired_messages.append(message)
 
             # 不在最近 7 条消息范围内的图片直接标记过期
+            if expired_messages:
+                ledger["token_estimate"] = None
+                ledger["version"] = ledger.get("version", 0) + 1
             for msg in expired_messages:
                 image_refs = self._extract_image_refs_from_content(msg.get("content"))
                 if image_refs:
@@ -1406,7 +1543,14 @@ class ConversationLedger:
             return 0
 
         effective_limit = min(limits)
-        if provider_limit and configured_limit and provider_limit > 0 and configured_limit > 0:
+        # 入账热路径每条消息都会走到这里，未开调试日志时跳过 f-string 构造
+        if (
+            provider_limit
+            and configured_limit
+            and provider_limit > 0
+            and configured_limit > 0
+            and logger.isEnabledFor(logging.DEBUG)
+        ):
             logger.debug(
                 f"AngelHeart[{chat_id}]: 上下文上限取较小值 "
                 f"(插件={configured_limit}, 模型={provider_limit}, 生效={effective_limit})"
@@ -1458,15 +1602,15 @@ class ConversationLedger:
         if last_time == 0.0:
             # 从未压缩过，检查会话中最早消息的时间
             ledger = self._get_or_create_ledger(chat_id)
-            with self._lock:
-                messages = ledger["messages"]
-                if not messages:
-                    return False
-                earliest_ts = messages[0].get("timestamp", 0)
-                # 如果最早消息距今超过遗忘时间，需要压缩
-                return (time.time() - earliest_ts) > forgetting_timeout
+            # 只读队首一条：切片一次性取到 0 或 1 条，不受并发裁剪影响，无需读锁
+            head = ledger["messages"][:1]
+            if not head:
+                return False
+            earliest_ts = head[0].get("timestamp", 0)
+            # 如果最早消息距今超过遗忘时间，需要压缩
+            return (time.time() - earliest_ts) > forgetting_timeout
         else:
-            return (time.time() - last_time) > forgetting_timeout
+            return (time.monotonic() - last_time) > forgetting_timeout
 
     def _count_message_tokens(self, msg: Dict) -> int:
         """
@@ -1503,6 +1647,9 @@ class ConversationLedger:
         """
         估算当前会话的Token数量
 
+        结果缓存在账本的 token_estimate 中：入账时增量累加，
+        整理、裁剪、转述等改写消息的路径置为 None，下次读取时再全量重算。
+
         Args:
             chat_id: 会话ID
 
@@ -1510,34 +1657,15 @@ class ConversationLedger:
             int: 估算的Token数量
         """
         ledger = self._get_or_create_ledger(chat_id)
-        with self._lock:
-            total_tokens = 0
-            messages = ledger["messages"]
-
-            for msg in messages:
-                # 获取消息内容
-                content = msg.get("content", "")
-
-                if isinstance(content, str):
-                    # 如果是字符串，直接计算
-                    total_tokens += self._count_tokens_in_text(content)
-                elif isinstance(content, list):
-                    # 如果是列表，遍历每个元素
-                    for item in content:
-                        if isinstance(item, dict):
-                            item_type = item.get("type", "")
-                            if item_type == "text":
-                                text = item.get("text", "")
-                                total_tokens += self._count_tokens_in_text(text)
-                            elif item_type == "image_url":
-                                # 图片内容估算为固定Token数
-                                total_tokens += 85  # OpenAI的图片Token估算
-
-                # 添加其他字段的Token估算
-                for key, value in msg.items():
-                    if key not in ["content", "timestamp", "is_processed"] and isinstance(value, str):
-                        total_tokens += self._count_tokens_in_text(value)
+        with self._lock.read():
+            cached = ledger.get("token_estimate")
+            if cached is not None:
+                return cached
 
+            total_tokens = sum(
+                self._count_message_tokens(msg) for msg in ledger["messages"]
+            )
+            ledger["token_estimate"] = total_tokens
             return total_tokens
 
     def _count_tokens_in_text(self, text: str) -> int:
@@ -1554,15 +1682,9 @@ class ConversationLedger:
             return 0
 
         # 基于中英文字符不同权重的Token估算逻辑
-        chinese_chars = 0
-        english_chars = 0
-
-        for char in text:
-            # 中文字符（包括中文标点）
-            if '\u4e00' <= char <= '\u9fff' or char in '，。！？；：""''（）【】《》':
-                chinese_chars += 1
-            else:
-                english_chars += 1
+        # 中文字符（包括中文标点）由正则在 C 层整体剔除，差值即中文字符数
+        chinese_chars = len(text) - len(_CHINESE_TOKEN_CHARS.sub("", text))
+        english_chars = len(text) - chinese_chars
 
         # 估算规则（用户提供）：
         # 1. 中文字符：每个字符约0.6个Token
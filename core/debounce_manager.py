@@ -32,7 +32,7 @@ BASE_REPLY_ENERGY_COST = 14.0
 ENERGY_COST_PER_CHARACTER = 0.12
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatEnergyState:
     """单群运行时能量；不持久化，插件重启后重新初始化。"""
 
@@ -40,7 +40,7 @@ class ChatEnergyState:
     updated_at: float = field(default_factory=time.time)
 
 
-@dataclass
+@dataclass(slots=True)
 class DebounceRecord:
     """单条防抖/扣押记录。"""
 
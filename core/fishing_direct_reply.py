@@ -56,7 +56,7 @@ class FishingDirectReply:
             # 原子性说明（为何不做跨管理器联合 API）：
             # - 边界 ID 来自事件 extra（防抖调度时已固化），不是现场读取共享状态；
             # - 账本快照读取 get_all_messages 自带 _lock，且两行之间无 await，无竞态窗口；
-            # - 快照按边界 ID 包含式截断（_slice_messages_through_id），新入账消息也会被切掉，
+            # - 快照按边界 ID 包含式截断（slice_messages_through_id），新入账消息也会被切掉，
             #   不会出现"边界说 5、内容含 6"。
             #
             # 边界消息为何不会被整理收掉：
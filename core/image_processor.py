@@ -1,7 +1,13 @@
+import asyncio
 import aiohttp
-import base64
 import io
+from typing import Optional
 from PIL import Image
+# 可选依赖：pybase64 使用 SIMD 加速编码，接口与标准库一致；未安装时回退标准库
+try:
+    import pybase64 as _b64
+except ImportError:
+    import base64 as _b64
 try:
     from astrbot.api import logger
 except ImportError:
@@ -9,10 +15,36 @@ except ImportError:
     logger = logging.getLogger(__name__)
 
 class ImageProcessor:
-    """图片处理器 - 负责异步下载和转换图片为JPEG格式"""
+    """图片处理器 - 负责异步下载和转换图片为JPEG格式
+
+    JPEG 编码走 PIL；生产环境推荐以 pillow-simd 替换 Pillow（同名 PIL 包，
+    SIMD 加速的 libjpeg-turbo 编码与色彩空间转换），无需改动本模块。
+    """
+
+    # JPEG 输出参数：optimize/progressive 会额外跑 Huffman 优化或多趟扫描，CPU 开销大且收益小
+    JPEG_SAVE_OPTIONS = {"quality": 85, "optimize": False, "progressive": False}
 
     def __init__(self, timeout: int = 30):
         self.timeout = aiohttp.ClientTimeout(total=timeout)
+        # 长生命周期会话：复用 TCP 连接与 DNS 缓存，避免每张图重新握手
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """懒加载共享会话；已关闭时重建。"""
+        if self._session is not None and not self._session.closed:
+            return self._session
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                self._session = aiohttp.ClientSession(timeout=self.timeout)
+            return self._session
+
+    async def close(self) -> None:
+        """关闭共享会话；插件卸载时调用。"""
+        async with self._session_lock:
+            session, self._session = self._session, None
+        if session is not None and not session.closed:
+            await session.close()
 
     async def convert_url_to_data_url(self, url: str) -> str:
         """异步将图片URL转换为JPEG格式的Base64 Data URL
@@ -20,43 +52,45 @@ class ImageProcessor:
         参考上游AstrBot实现，统一转换为JPEG格式以避免MIME类型兼容性问题
         """
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(url) as resp:
-                    if resp.status == 200:
-                        # 读取原始图片数据
-                        image_data = await resp.read()
-
-                        # 使用PIL加载图片并转换为JPEG
-                        try:
-                            # 加载图片
-                            img = Image.open(io.BytesIO(image_data))
-
-                            # 转换为RGB模式（处理RGBA、灰度等格式）
-                            if img.mode in ('RGBA', 'LA', 'P'):
-                                img = img.convert('RGB')
-
-                            # 保存为JPEG到内存
-                            output = io.BytesIO()
-                            img.save(output, format='JPEG', quality=85)
-                            jpeg_data = output.getvalue()
-
-                            # 转换为Base64
-                            base64_encoded = base64.b64encode(jpeg_data).decode('utf-8')
-
-                            # 统一使用JPEG MIME类型
-                            data_url = f"data:image/jpeg;base64,{base64_encoded}"
-
-                            logger.debug(f"图片转换成功: {url} -> JPEG, 大小: {len(jpeg_data)} bytes")
-                            return data_url
-
-                        except Exception as e:
-                            logger.warning(f"PIL图片处理失败: {e}, URL: {url}")
-                            # PIL处理失败时，尝试直接编码原始数据
-                            base64_encoded = base64.b64encode(image_data).decode('utf-8')
-                            return f"data:image/jpeg;base64,{base64_encoded}"
-                    else:
-                        logger.warning(f"图片下载失败，状态码: {resp.status}, URL: {url}")
-                        return ""
+            session = await self._get_session()
+            async with session.get(url) as resp:
+                if resp.status == 200:
+                    # 读取原始图片数据
+                    image_data = await resp.read()
+
+                    # 使用PIL加载图片并转换为JPEG
+                    try:
+                        # 加载图片
+                        img = Image.open(io.BytesIO(image_data))
+                        # JPEG 源图按目标模式草稿解码，跳过一次完整的色彩转换；其他格式为空操作
+                        img.draft('RGB', img.size)
+
+                        # 转换为RGB模式（处理RGBA、灰度等格式）
+                        if img.mode in ('RGBA', 'LA', 'P'):
+                            img = img.convert('RGB')
+
+                        # 保存为JPEG到内存
+                        output = io.BytesIO()
+                        img.save(output, format='JPEG', **self.JPEG_SAVE_OPTIONS)
+                        jpeg_data = output.getvalue()
+
+                        # 转换为Base64
+                        base64_encoded = _b64.b64encode(jpeg_data).decode('ascii')
+
+                        # 统一使用JPEG MIME类型
+                        data_url = f"data:image/jpeg;base64,{base64_encoded}"
+
+                        logger.debug(f"图片转换成功: {url} -> JPEG, 大小: {len(jpeg_data)} bytes")
+                        return data_url
+
+                    except Exception as e:
+                        logger.warning(f"PIL图片处理失败: {e}, URL: {url}")
+                        # PIL处理失败时，尝试直接编码原始数据
+                        base64_encoded = _b64.b64encode(image_data).decode('ascii')
+                        return f"data:image/jpeg;base64,{base64_encoded}"
+                else:
+                    logger.warning(f"图片下载失败，状态码: {resp.status}, URL: {url}")
+                    return ""
 
         except Exception as e:
             logger.error(f"图片转换异常: {e}, URL: {url}")
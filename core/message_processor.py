@@ -95,8 +95,9 @@ class MessageProcessor:
             }
 
         # 预处理消息内容：使用已有的图片转述和多模态内容
-        processed_msg = copy.deepcopy(msg)
-        original_content = processed_msg.get("content", [])
+        # 浅拷贝即可：content 随后整体替换为标准化后的新列表，其余字段只读
+        processed_msg = msg.copy()
+        original_content = msg.get("content", [])
 
         # 标准化 content 为列表格式
         content_list = self._normalize_content(original_content)
@@ -112,8 +113,8 @@ class MessageProcessor:
         # 调用文本格式化工具生成结构化文本
         xml_content = format_message_to_text(processed_msg, self.alias)
 
-        # 提取原始的图片组件
-        image_components = self._extract_image_components(original_content)
+        # 提取原始的图片组件（会进入上游请求，单独深拷贝与账本隔离）
+        image_components = copy.deepcopy(self._extract_image_components(original_content))
         image_ref_text = self._build_image_refs_text(image_components)
 
         # 构建最终内容
@@ -0,0 +1,76 @@
+"""读写锁：读者之间并行，写者独占。
+
+对外保持 threading.Lock 的写锁接口（acquire/release/with），
+既有 `with lock:` 写路径无需改动；只读路径改用 `with lock.read():`。
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """写者优先的读写锁，不可重入。
+
+    有写者排队时新读者让路，避免读多写少场景下写者饿死。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    def acquire_read(self) -> None:
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        """共享读锁上下文。"""
+        self.acquire_read()
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        """获取独占写锁，签名与 threading.Lock.acquire 一致。"""
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                if not blocking:
+                    acquired = not self._writer and self._readers == 0
+                else:
+                    acquired = self._cond.wait_for(
+                        lambda: not self._writer and self._readers == 0,
+                        None if timeout < 0 else timeout,
+                    )
+            finally:
+                self._writers_waiting -= 1
+            if acquired:
+                self._writer = True
+            else:
+                # 放弃排队的写者可能正挡着读者
+                self._cond.notify_all()
+            return acquired
+
+    def release(self) -> None:
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
@@ -21,6 +21,7 @@ from .context_utils import (
     partition_dialogue_raw,
     format_final_prompt,
     format_decision_xml,
+    slice_messages_through_id,
 )
 from .xml_formatter import format_message_to_text
 from .json_parser import JsonParser
@@ -52,6 +53,7 @@ __all__ = [
     'json_serialize_context',
     'partition_dialogue',
     'format_decision_xml',
+    'slice_messages_through_id',
     # XML 格式化相关
     'format_message_to_text',
     'partition_dialogue_raw',
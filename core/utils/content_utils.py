@@ -21,14 +21,12 @@ def convert_content_to_string(content) -> str:
 
     elif isinstance(content, list):
         # 处理标准多模态 content 列表：[{"type": "text", "text": "..."}, {"type": "image_url", ...}]
-        text_parts = []
-        for item in content:
-            if isinstance(item, dict) and item.get("type") == "text":
-                text_content = item.get("text", "")
-                if text_content:
-                    text_parts.append(text_content)
-        # 拼接所有文本部分
-        return "".join(text_parts).strip()
+        # 单个推导式交给 join 拼接：str.join 本就要先物化序列，推导式比逐次 append 少一层调用
+        return "".join([
+            item["text"]
+            for item in content
+            if isinstance(item, dict) and item.get("type") == "text" and item.get("text")
+        ]).strip()
 
     else:
         # 如果 content 是其他类型，尝试转换为字符串
@@ -20,6 +20,7 @@ except ImportError:
 
 
 _GENERIC_IMAGE_PLACEHOLDER_RE = re.compile(r"(?:\s*\[图片\]\s*)+")
+_COMPACT_JSON_SEPARATORS = (",", ":")
 
 
 def json_serialize_context(
@@ -64,7 +65,13 @@ def json_serialize_context(
             "chat_records": validated_records,
             "secretary_decision": decision_dict,
         }
-        return json.dumps(context_data, ensure_ascii=False, default=str)
+        # 直出 UTF-8 且去掉分隔符空白：中文不转义为 \uXXXX，载荷更小
+        return json.dumps(
+            context_data,
+            ensure_ascii=False,
+            separators=_COMPACT_JSON_SEPARATORS,
+            default=str,
+        )
     except (TypeError, ValueError) as e:
         logger.error(f"序列化上下文失败: {e}")
         fallback_context = {
@@ -72,18 +79,27 @@ def json_serialize_context(
             "secretary_decision": {"should_reply": False, "error": "序列化失败"},
             "error": "序列化失败",
         }
-        return json.dumps(fallback_context, ensure_ascii=False)
+        return json.dumps(
+            fallback_context, ensure_ascii=False, separators=_COMPACT_JSON_SEPARATORS
+        )
 
 
-def _slice_messages_through_id(
+def slice_messages_through_id(
     messages: List[Dict], boundary_message_id: str
 ) -> List[Dict]:
-    """按消息 ID 包含式截断；找不到明确边界时拒绝扩窗。"""
+    """按消息 ID 包含式截断；找不到明确边界时拒绝扩窗。
+
+    边界几乎总是最新的几条消息，因此从尾部向前找，命中成本只与
+    边界之后的消息数有关，不随账本长度增长。
+
+    source_message_id 重复时（如 QQ 历史回填与实时消息带同一 ID），
+    以最后一条（最新）命中为边界。
+    """
     boundary_message_id = str(boundary_message_id or "")
     if not boundary_message_id:
         return messages
-    for index, message in enumerate(messages):
-        if str(message.get("source_message_id", "") or "") == boundary_message_id:
+    for index in range(len(messages) - 1, -1, -1):
+        if str(messages[index].get("source_message_id", "") or "") == boundary_message_id:
             return messages[: index + 1]
     logger.warning(f"上下文边界消息不存在: {boundary_message_id}")
     return []
@@ -100,9 +116,7 @@ def partition_dialogue(
     - 当前连续消息块整体作为 recent（不再用 is_processed）
     - boundary 为块尾时间戳
     """
-    all_messages = _slice_messages_through_id(
-        ledger.get_all_messages(chat_id), boundary_message_id
-    )
+    all_messages = ledger.get_messages_through(chat_id, boundary_message_id)
     summary = ""
     try:
         summary = ledger.get_current_summary(chat_id)
@@ -139,8 +153,8 @@ def partition_dialogue(
             ]
         else:
             # 块内已有摘要消息：把它视作历史前缀，其余当 recent
-            historical_context = [recent_dialogue[0]]
-            recent_dialogue = recent_dialogue[1:]
+            # recent_dialogue 是本函数自建的列表，原地摘掉首项，不再切片复制
+            historical_context = [recent_dialogue.pop(0)]
 
     return historical_context, recent_dialogue, boundary_ts
 
@@ -203,16 +217,17 @@ def partition_dialogue_raw(
     - 保留工具结构
     - 不再使用 is_processed
     """
-    all_messages = _slice_messages_through_id(
-        ledger.get_all_messages(chat_id), boundary_message_id
-    )
+    all_messages = ledger.get_messages_through(chat_id, boundary_message_id)
     summary = ""
     try:
         summary = ledger.get_current_summary(chat_id)
     except Exception:
         summary = ""
 
-    recent_dialogue = sorted(all_messages, key=lambda m: m.get("timestamp", 0))
+    # get_messages_through 返回的已是独立副本：原地排序（账本本就有序，
+    # Timsort 只需一趟线性检查），不再 sorted 出第二份列表
+    recent_dialogue = all_messages
+    recent_dialogue.sort(key=lambda m: m.get("timestamp", 0))
     boundary_ts = recent_dialogue[-1].get("timestamp", 0.0) if recent_dialogue else 0.0
 
     historical_context = []
@@ -234,8 +249,7 @@ def partition_dialogue_raw(
                 }
             ]
         else:
-            historical_context = [recent_dialogue[0]]
-            recent_dialogue = recent_dialogue[1:]
+            historical_context = [recent_dialogue.pop(0)]
 
     return historical_context, recent_dialogue, boundary_ts
 
@@ -15,6 +15,13 @@ except ImportError:
 # 定义默认时间戳回退时间（1小时），用于当消息没有时间戳时提供一个基准时间
 DEFAULT_TIMESTAMP_FALLBACK_SECONDS = 3600
 
+# 相对时间分档：(上界秒数, 换算单位秒数, 文案模板)，按上界升序匹配
+_RELATIVE_TIME_BUCKETS = (
+    (60, 1, " (刚刚)"),
+    (3600, 60, " ({}分钟前)"),
+    (86400, 3600, " ({}小时前)"),
+)
+
 
 def get_latest_message_time(messages: list[dict]) -> float:
     """
@@ -61,30 +68,24 @@ def format_relative_time(timestamp: float) -> str:
     if not timestamp:
         return ""
 
-    try:
-        # 确保 timestamp 是数字类型
-        timestamp = float(timestamp)
-    except (ValueError, TypeError):
-        return ""
-
-    now = time.time()
-    delta = now - timestamp
+    # 账本入账时已统一为 float，常见路径跳过转换
+    if type(timestamp) is not float:
+        try:
+            timestamp = float(timestamp)
+        except (ValueError, TypeError):
+            return ""
 
+    delta = time.time() - timestamp
     if delta < 0:
         # 时间在未来，这通常表示有问题，返回空
         return ""
-    elif delta < 60:
-        return " (刚刚)"
-    elif delta < 3600:
-        minutes = int(delta / 60)
-        return f" ({minutes}分钟前)"
-    elif delta < 86400:  # 24小时
-        hours = int(delta / 3600)
-        return f" ({hours}小时前)"
-    else:
-        # 超过一天，可以考虑返回日期，这里简化处理
-        days = int(delta / 86400)
-        return f" ({days}天前)"
+
+    seconds = int(delta)
+    for threshold, unit, template in _RELATIVE_TIME_BUCKETS:
+        if seconds < threshold:
+            return template.format(seconds // unit)
+    # 超过一天，可以考虑返回日期，这里简化处理
+    return f" ({seconds // 86400}天前)"
 
 
 def get_beijing_time_str() -> str:
@@ -6,6 +6,9 @@ AngelHeart 插件 - 消息格式化工具
 from .time_utils import format_relative_time, format_absolute_time
 from .content_utils import convert_content_to_string
 
+# 无专属格式的角色 → 文本标签；未登记的角色直接使用角色名
+_ROLE_LABELS = {"system": "系统通知"}
+
 
 def build_image_attachment_text(msg: dict) -> str:
     """按统一格式构建图片附件文本块。"""
@@ -161,17 +164,13 @@ def format_message_to_text(
             # 直接返回内容，不带[助理:...]前缀，避免复读历史
             formatted_body = f"{text_content}"
 
-    # 3. System (系统) 消息处理
-    elif role == "system":
-        formatted_body = f"[系统通知]\n{text_content}"
-
-    # 4. Tool (工具结果) 消息处理 - 此分支已废弃
+    # 3. Tool (工具结果) 消息处理 - 此分支已废弃
     # 由于已切换到原生工具调用格式，此处的文本化逻辑不再需要。
     # 在 front_desk.py 中，role == "tool" 的消息会直接保留原始结构。
 
-    # 5. 其他默认处理
+    # 4. System (系统) 及其他角色：查表取标签，不再逐个分支比较
     else:
-        formatted_body = f"[{role}]\n{text_content}"
+        formatted_body = f"[{_ROLE_LABELS.get(role, role)}]\n{text_content}"
 
     # 应用 XML 包裹
     if wrapper_tag:
@@ -22,7 +22,7 @@ from typing import Callable, Dict, List, Optional
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkItem:
     work_id: str
     chat_id: str
@@ -5,7 +5,6 @@ AngelHeart 插件 - 前台角色 (FrontDesk)
 
 import asyncio
 import base64
-import copy
 import json
 import os
 import re
@@ -69,6 +68,21 @@ class FrontDesk:
         "tool",
     }
 
+    # 静态提示词模板：类定义时绑定一次 str.format，每次重写只填变量
+    GROUP_SCENE_HINT = "这是一个群聊场景。"
+    PRIVATE_SCENE_PROMPT = "你正在一个私聊中扮演角色，你的昵称是 '{alias}'。"
+    _FOCUS_REPLY_REMINDER = (
+        "请认真回答：先给结论，再给必要依据，长度以 {limit} 字左右为宜。"
+        "确实需要时可以超出，重点是讲清楚，不要注水、不要重复。"
+        "如果是分析的，不要正反面讲解，直接给出你认为的最佳结论，只给出必要的关键推理。"
+    ).format
+    _NORMAL_REPLY_REMINDER = (
+        "回复尽量简短，通常一两句话、{limit} 字左右即可说清。"
+        "但如果问题复杂度高、三言两语说不清，或者用户明确要求多说一些，"
+        "可以适度超出，以讲清楚为准。"
+        "不要正反面讲解，直接给出你认为的最佳结论，不需要推理过程。"
+    ).format
+
     def __init__(self, config_manager, angel_context):
         """
         初始化前台角色。
@@ -313,34 +327,39 @@ class FrontDesk:
             f"AngelHeart[{chat_id}]: 缓存消息，展示正文: '{text_content}', 匹配正文: '{body_text}'"
         )
 
-        # 2. 构建标准多模态 content 列表
-        content_list = []
-        if text_content:
-            content_list.append({"type": "text", "text": text_content})
-
-        # 3. 处理图片与文件组件
-        for component in message_chain:
-            if isinstance(component, Image):
-                try:
-                    item = await self._build_cached_image_item(chat_id, component)
-                    if item:
-                        content_list.append(item)
-                    else:
-                        content_list.append({"type": "text", "text": "[图片处理失败]"})
-                except Exception as e:
-                    original_url = component.url or component.file or "未知URL"
-                    logger.debug(f"AngelHeart[{chat_id}]: 图片处理跳过，URL: {original_url}, 原因: {str(e)[:100]}")
-
-            elif isinstance(component, File):
-                try:
-                    content_list.append(await self._build_cached_file_text_item(chat_id, component))
-                except Exception as e:
-                    logger.debug(f"AngelHeart[{chat_id}]: File 组件处理异常: {e}")
-                    content_list.append({"type": "text", "text": f"[文件处理异常: {getattr(component, 'name', '')}]"})
+        # 2. 构建 content：纯文本消息（不含图片/文件）直接存字符串，
+        #    只有真正的多模态消息才构建标准列表；下游统一兼容 str / list 两种形态
+        if not any(isinstance(component, (Image, File)) for component in message_chain):
+            content = text_content
+        else:
+            content_list = []
+            if text_content:
+                content_list.append({"type": "text", "text": text_content})
 
-        # 4. 如果没有内容，创建一个空文本
-        if not content_list:
-            content_list.append({"type": "text", "text": ""})
+            # 3. 处理图片与文件组件
+            for component in message_chain:
+                if isinstance(component, Image):
+                    try:
+                        item = await self._build_cached_image_item(chat_id, component)
+                        if item:
+                            content_list.append(item)
+                        else:
+                            content_list.append({"type": "text", "text": "[图片处理失败]"})
+                    except Exception as e:
+                        original_url = component.url or component.file or "未知URL"
+                        logger.debug(f"AngelHeart[{chat_id}]: 图片处理跳过，URL: {original_url}, 原因: {str(e)[:100]}")
+
+                elif isinstance(component, File):
+                    try:
+                        content_list.append(await self._build_cached_file_text_item(chat_id, component))
+                    except Exception as e:
+                        logger.debug(f"AngelHeart[{chat_id}]: File 组件处理异常: {e}")
+                        content_list.append({"type": "text", "text": f"[文件处理异常: {getattr(component, 'name', '')}]"})
+
+            # 4. 如果没有内容，创建一个空文本
+            if not content_list:
+                content_list.append({"type": "text", "text": ""})
+            content = content_list
 
         # 5. 构建完整的消息字典
         source_message_id = self._get_event_message_id(event)
@@ -382,7 +401,7 @@ class FrontDesk:
 
         new_message = {
             "role": "user",
-            "content": content_list,  # 标准多模态列表
+            "content": content,  # 纯文本为字符串，多模态为标准列表
             "sender_id": event.get_sender_id(),
             "sender_name": self._normalize_sender_name(
                 event.get_sender_id(),
@@ -698,7 +717,7 @@ class FrontDesk:
         task.add_done_callback(_done)
 
     async def cleanup_background_tasks(self) -> None:
-        """取消并等待前台创建的全部后台任务退出。"""
+        """取消并等待前台创建的全部后台任务退出，并关闭图片下载会话。"""
         tasks = list(self._private_compression_tasks.values())
         self._private_compression_tasks.clear()
         for task in tasks:
@@ -706,6 +725,7 @@ class FrontDesk:
                 task.cancel()
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
+        await self.image_processor.close()
 
     async def _maybe_private_llm_compress(self, chat_id: str):
         """私聊主动 LLM 摘要压缩。"""
@@ -1500,44 +1520,35 @@ class FrontDesk:
             images_filtered_count = 0
 
             for msg in contexts:
-                filtered_msg = copy.deepcopy(msg)  # 深拷贝避免修改原始数据
+                role = msg.get("role")
+                content = msg.get("content")
+                # user / assistant 的多模态列表才可能带图片；assistant 历史须保留
+                # think / text / tool_calls 等结构，两者都只移除图片组件
+                if role not in ("user", "assistant") or not isinstance(content, list):
+                    filtered_contexts.append(msg)
+                    continue
 
-                if msg.get("role") == "user" and isinstance(
-                    filtered_msg.get("content"), list
-                ):
-                    original_content = filtered_msg["content"]
-                    filtered_content = []
-                    has_image = False
-
-                    for item in original_content:
-                        # 只处理字典类型的组件，保留 Pydantic 模型对象（如 ThinkPart）
-                        if isinstance(item, dict) and item.get("type") == "image_url":
-                            has_image = True
-                            images_filtered_count += 1
-                            # 静默移除图片，不添加任何提示
-                        else:
-                            # 保留非图片的所有组件（文本、ThinkPart、文件等）
-                            filtered_content.append(item)
-
-                    filtered_msg["content"] = filtered_content
-
-                    if has_image:
-                        logger.debug(
-                            f"AngelHeart[{chat_id}]: 已过滤用户消息中的图片内容"
-                        )
-
-                elif msg.get("role") == "assistant":
-                    # assistant 历史必须保留 think / text / tool_calls 等结构，只移除图片。
-                    content = filtered_msg.get("content", [])
-                    if isinstance(content, list):
-                        filtered_content = []
-                        for item in content:
-                            if isinstance(item, dict) and item.get("type") == "image_url":
-                                images_filtered_count += 1
-                                continue
-                            filtered_content.append(item)
-                        filtered_msg["content"] = filtered_content
+                # 保留非图片的所有组件（文本、ThinkPart、文件等），组件本身按引用复用
+                filtered_content = [
+                    item
+                    for item in content
+                    if not (isinstance(item, dict) and item.get("type") == "image_url")
+                ]
+                removed = len(content) - len(filtered_content)
+                if not removed:
+                    # 无图片可滤：原样复用，不再整条深拷贝
+                    filtered_contexts.append(msg)
+                    continue
 
+                images_filtered_count += removed
+                if role == "user":
+                    # 静默移除图片，不添加任何提示
+                    logger.debug(
+                        f"AngelHeart[{chat_id}]: 已过滤用户消息中的图片内容"
+                    )
+                # 只复制外层字典替换 content，不修改原始数据
+                filtered_msg = msg.copy()
+                filtered_msg["content"] = filtered_content
                 filtered_contexts.append(filtered_msg)
 
             if images_filtered_count > 0:
@@ -1689,17 +1700,8 @@ class FrontDesk:
         normal_limit = max(1, normal_limit)
         focus_limit = max(normal_limit, focus_limit)
         if focus:
-            return (
-                f"请认真回答：先给结论，再给必要依据，长度以 {focus_limit} 字左右为宜。"
-                "确实需要时可以超出，重点是讲清楚，不要注水、不要重复。"
-                "如果是分析的，不要正反面讲解，直接给出你认为的最佳结论，只给出必要的关键推理。"
-            )
-        return (
-            f"回复尽量简短，通常一两句话、{normal_limit} 字左右即可说清。"
-            "但如果问题复杂度高、三言两语说不清，或者用户明确要求多说一些，"
-            "可以适度超出，以讲清楚为准。"
-            "不要正反面讲解，直接给出你认为的最佳结论，不需要推理过程。"
-        )
+            return self._FOCUS_REPLY_REMINDER(limit=focus_limit)
+        return self._NORMAL_REPLY_REMINDER(limit=normal_limit)
 
     def _build_temporary_reply_length_context(
         self,
@@ -1811,30 +1813,25 @@ class FrontDesk:
         current_message_id: str,
         scene_hint: str | None = None,
     ) -> List[Dict]:
-        """使用 MessageProcessor 构建上下文列表"""
-        new_contexts = []
-        if scene_hint:
-            # 在最顶部添加场景说明消息，避免某些模型不允许第一条消息是助理
-            new_contexts.append(
-                {
-                    "role": "user",
-                    "content": [{"type": "text", "text": scene_hint}]
-                }
-            )
-
-        # 1) 历史消息
-        for msg in historical_context:
-            processed_msg = processor.process_message(msg)
-            new_contexts.append(processed_msg)
-
-        # 2) 最新消息（按当前消息 ID 过滤，避免与 req.prompt 对应的新消息重复）
-        for msg in recent_dialogue:
-            if current_message_id and str(msg.get("source_message_id", "") or "") == current_message_id:
-                continue
-            processed_msg = processor.process_message(msg)
-            new_contexts.append(processed_msg)
-
-        return new_contexts
+        """使用 MessageProcessor 构建上下文列表（一次性构造，不逐条 append）"""
+        # 在最顶部添加场景说明消息，避免某些模型不允许第一条消息是助理
+        scene_messages = (
+            [{"role": "user", "content": [{"type": "text", "text": scene_hint}]}]
+            if scene_hint
+            else []
+        )
+        return [
+            *scene_messages,
+            # 1) 历史消息
+            *(processor.process_message(msg) for msg in historical_context),
+            # 2) 最新消息（按当前消息 ID 过滤，避免与 req.prompt 对应的新消息重复）
+            *(
+                processor.process_message(msg)
+                for msg in recent_dialogue
+                if not current_message_id
+                or str(msg.get("source_message_id", "") or "") != current_message_id
+            ),
+        ]
 
     def _collect_non_current_image_urls(
         self, recent_dialogue: List[Dict], current_message_id: str
@@ -2026,9 +2023,9 @@ class FrontDesk:
         final_prompt_str = self._generate_final_prompt(prompt_recent_dialogue, None, alias)
         should_mark_processed = True
         if self._is_group_chat(chat_id):
-            scene_hint = "这是一个群聊场景。"
+            scene_hint = self.GROUP_SCENE_HINT
         elif self._is_private_chat(chat_id):
-            scene_prompt = "你正在一个私聊中扮演角色，你的昵称是 '{alias}'。"
+            scene_prompt = self.PRIVATE_SCENE_PROMPT
 
         # 2. 标记已处理消息（如果需要）
         self._mark_processed_if_needed(chat_id, recent_dialogue, should_mark_processed)
@@ -2054,8 +2051,6 @@ class FrontDesk:
 
         # 4. 注入工作账本临时提醒（不保存），不再注入秘书决策建议
         work_context = self._build_temporary_work_ledger_context(chat_id, event)
-        if work_context:
-            new_contexts.append(work_context)
 
         # 4.1 群聊注入回复字数提醒（常规/焦点）
         length_context = self._build_temporary_reply_length_context(
@@ -2063,8 +2058,9 @@ class FrontDesk:
             context_recent_dialogue,
             prompt_recent_dialogue,
         )
-        if length_context:
-            new_contexts.append(length_context)
+        new_contexts.extend(
+            context for context in (work_context, length_context) if context
+        )
 
         # 5. 根据 Provider 的 modalities 配置过滤图片内容
         new_contexts = self.filter_images_for_provider(chat_id, new_contexts)
@@ -1,8 +1,12 @@
-"""pytest 配置文件：补齐 AstrBot 最小测试桩并清理 SQLite 连接。"""
+"""pytest 配置文件：补齐 AstrBot 最小测试桩并清理 SQLite 连接。
+
+AstrBot 桩只在这里注册一次，各测试模块不再各自重复注入 sys.modules。
+"""
 
 import gc
 import sys
 import types
+from unittest.mock import MagicMock
 
 import pytest
 
@@ -15,6 +19,8 @@ astrbot_core_agent_module = types.ModuleType("astrbot.core.agent")
 astrbot_core_agent_message_module = types.ModuleType("astrbot.core.agent.message")
 astrbot_core_message_module = types.ModuleType("astrbot.core.message")
 astrbot_components_module = types.ModuleType("astrbot.core.message.components")
+astrbot_core_star_module = types.ModuleType("astrbot.core.star")
+astrbot_core_star_context_module = types.ModuleType("astrbot.core.star.context")
 
 
 class AstrMessageEvent:
@@ -51,6 +57,10 @@ class Reply:
     pass
 
 
+class Context:
+    pass
+
+
 class ImageURLPart:
     def __init__(self, image_url):
         if isinstance(image_url, dict):
@@ -65,13 +75,16 @@ class ImageURLPart:
 
 
 astrbot_api_event_module.AstrMessageEvent = AstrMessageEvent
+astrbot_api_event_module.MessageChain = MagicMock
 astrbot_api_module.FunctionTool = FunctionTool
+astrbot_api_module.logger = MagicMock()
 astrbot_components_module.At = At
 astrbot_components_module.File = File
 astrbot_components_module.Image = Image
 astrbot_components_module.Plain = Plain
 astrbot_components_module.Reply = Reply
 astrbot_core_agent_message_module.ImageURLPart = ImageURLPart
+astrbot_core_star_context_module.Context = Context
 
 sys.modules.setdefault("astrbot", astrbot_module)
 sys.modules.setdefault("astrbot.api", astrbot_api_module)
@@ -81,6 +94,8 @@ sys.modules.setdefault("astrbot.core.agent", astrbot_core_agent_module)
 sys.modules.setdefault("astrbot.core.agent.message", astrbot_core_agent_message_module)
 sys.modules.setdefault("astrbot.core.message", astrbot_core_message_module)
 sys.modules.setdefault("astrbot.core.message.components", astrbot_components_module)
+sys.modules.setdefault("astrbot.core.star", astrbot_core_star_module)
+sys.modules.setdefault("astrbot.core.star.context", astrbot_core_star_context_module)
 
 
 @pytest.fixture(autouse=True)
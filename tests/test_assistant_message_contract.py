@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import sys
-import types
 from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import MagicMock
@@ -12,31 +11,6 @@ _PARENT = str(PLUGIN_ROOT.parent)
 if _PARENT not in sys.path:
     sys.path.insert(0, _PARENT)
 
-for _mod_path in (
-    "astrbot",
-    "astrbot.api",
-    "astrbot.api.event",
-    "astrbot.core",
-    "astrbot.core.agent",
-    "astrbot.core.agent.message",
-    "astrbot.core.message",
-    "astrbot.core.message.components",
-    "astrbot.core.star",
-    "astrbot.core.star.context",
-):
-    sys.modules.setdefault(_mod_path, types.ModuleType(_mod_path))
-
-sys.modules["astrbot.api"].logger = MagicMock()
-sys.modules["astrbot.core.message.components"].Image = type("Image", (), {})
-sys.modules["astrbot.core.message.components"].At = type("At", (), {})
-sys.modules["astrbot.core.message.components"].File = type("File", (), {})
-sys.modules["astrbot.core.star.context"].Context = type("Context", (), {})
-sys.modules["astrbot.core.agent.message"].ImageURLPart = type(
-    "ImageURLPart",
-    (),
-    {"__init__": lambda self, image_url: setattr(self, "image_url", SimpleNamespace(**image_url))},
-)
-
 from astrbot_plugin_angel_heart.core.message_processor import MessageProcessor
 from astrbot_plugin_angel_heart.core.utils.message_utils import (
     estimate_provider_request_baseline_count,
@@ -152,9 +126,7 @@ def test_message_processor_preserves_assistant_structured_content():
 
 
 def test_filter_images_for_provider_keeps_assistant_think_parts():
-    config = MagicMock()
-    config.alias = "fairy"
-    config.image_caption_provider_id = ""
+    config = SimpleNamespace(alias="fairy", image_caption_provider_id="")
     angel = MagicMock()
     angel.astr_context = MagicMock()
     front_desk = FrontDesk(config, angel)
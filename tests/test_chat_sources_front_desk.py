@@ -23,8 +23,7 @@ class SourceEvent:
         self.message_str = message_str
         self.unified_msg_origin = chat_id
         self.extras = {}
-        self._result = MagicMock()
-        self._result.chain = ["x"]
+        self._result = types.SimpleNamespace(chain=["x"])
         self._messages = None
 
     def set_extra(self, key, value):
@@ -64,12 +63,19 @@ class SourceEvent:
         return 1785991141.0
 
 
+def make_config(**overrides):
+    """cache_message 只经 for_chat 读取 alias / focus_instructions，用纯属性对象承接。"""
+    config = types.SimpleNamespace(alias="", focus_instructions="", **overrides)
+    config.for_chat = lambda chat_id: config
+    return config
+
+
 def make_front_desk(store, config_manager=None):
     if config_manager is None:
-        config_manager = MagicMock()
+        config_manager = make_config()
     angel = MagicMock()
-    angel.conversation_ledger = MagicMock()
-    angel.conversation_ledger.add_message = MagicMock()
+    # 登记路径只会入账一条消息：限定属性集，误用其他账本接口会直接报错
+    angel.conversation_ledger = MagicMock(spec_set=["add_message"])
     angel.astr_context = MagicMock()
     fd = FrontDesk(config_manager, angel)
     fd.chat_sources = store
@@ -98,6 +104,7 @@ async def test_group_source_recorded_with_group_name(tmp_path):
 
     await fd.cache_message(event.unified_msg_origin, event)
 
+    fd.context.conversation_ledger.add_message.assert_called_once()
     entry = store.get_source("aiocqhttp:GroupMessage:830624502")
     assert entry is not None
     assert entry["kind"] == "group"
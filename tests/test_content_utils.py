@@ -0,0 +1,67 @@
+"""测试：content_utils 纯文本提取与 Markdown 清洗"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.utils import content_utils
+from core.utils.content_utils import convert_content_to_string, strip_markdown
+
+
+def test_convert_string_content_is_stripped():
+    assert convert_content_to_string("  你好  ") == "你好"
+
+
+def test_convert_multimodal_content_keeps_only_text():
+    content = [
+        {"type": "text", "text": " 看"},
+        {"type": "image_url", "image_url": {"url": "https://example.com/a.png"}},
+        {"type": "text", "text": ""},
+        {"type": "text"},
+        "not a dict",
+        {"type": "text", "text": "图 "},
+    ]
+
+    assert convert_content_to_string(content) == "看图"
+
+
+def test_convert_other_content_uses_str():
+    assert convert_content_to_string(42) == "42"
+    assert convert_content_to_string([]) == ""
+
+
+# strip_markdown 直接使用模块级共享的 MarkdownIt 实例，测试无需逐个 patch 渲染器
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("", ""),
+    ("Hello World", "Hello World"),
+    ("**加粗** 与 *斜体*", "加粗 与 斜体"),
+    ("**bold *italic* bold**", "bold italic bold"),
+    ("`code`", "code"),
+    ("[链接](https://example.com)", "链接"),
+    ("# 标题", "标题"),
+    ("- a\n- b", "a\nb"),
+    # 单行末尾句号去掉，多行保持原样
+    ("好的。", "好的"),
+    ("Done.", "Done"),
+    ("第一行。\n第二行。", "第一行。\n第二行。"),
+    # 先清洗思维链再渲染
+    ("推理过程</think>最终回答。", "最终回答"),
+])
+def test_strip_markdown(text, expected):
+    assert strip_markdown(text) == expected
+
+
+def test_strip_markdown_reuses_module_renderer(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("strip_markdown 不应在调用时新建 MarkdownIt")
+
+    monkeypatch.setattr(content_utils, "MarkdownIt", fail)
+
+    assert strip_markdown("**x**") == "x"
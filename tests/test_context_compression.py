@@ -15,7 +15,8 @@ import time
 import threading
 import tempfile
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict
+from unittest.mock import MagicMock
 
 # 确保项目根目录在 sys.path 中
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -27,6 +28,23 @@ if str(PROJECT_ROOT) not in sys.path:
 import pytest
 
 
+# 固定时间基准：需要控制时钟的用例以此为“当前时间”，不依赖真实墙钟与 sleep
+BASE_TIME = 1_700_000_000.0
+
+
+class FakeClock:
+    """可推进的假时钟，替换 time.time / time.monotonic。"""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
 class MockConfigManager:
     """模拟配置管理器"""
 
@@ -149,43 +167,58 @@ def ledger_large_budget(temp_dir):
     lg.db_conn.close()
 
 
+@pytest.fixture(scope="module")
+def estimator(tmp_path_factory):
+    """只读估算用 ledger：估算方法是纯计算、不改账本状态，整个模块共用一个实例"""
+    lg = _create_ledger(
+        tmp_path_factory.mktemp("token_estimation"),
+        max_conversation_tokens=100000,
+    )
+    yield lg
+    lg.db_conn.close()
+
+
 class TestCompressionTrigger:
     """测试压缩触发条件"""
 
-    def test_effective_limit_uses_smaller_provider_limit(self, temp_dir):
-        """模型上下文更小时，使用模型上限触发压缩"""
+    @pytest.mark.parametrize("plugin_limit,provider_limit,expected", [
+        # 模型上下文更小时，使用模型上限触发压缩
+        (5000, 1000, 1000),
+        # 插件侧上限更小时，使用插件上限触发压缩
+        (100000, 1000000, 100000),
+        # 插件配置为0时，不限制插件侧上限，改用模型上限
+        (0, 2048, 2048),
+    ])
+    def test_effective_limit_takes_smaller_positive_limit(
+        self, temp_dir, plugin_limit, provider_limit, expected
+    ):
+        """有效上限取插件与模型上限中较小的正数"""
         ledger = _create_ledger(
             temp_dir,
-            astr_context=MockAstrContext(max_context_tokens=1000),
-            max_conversation_tokens=5000,
+            astr_context=MockAstrContext(max_context_tokens=provider_limit),
+            max_conversation_tokens=plugin_limit,
             context_forgetting_timeout=0,
         )
 
-        assert ledger._get_effective_max_conversation_tokens("test") == 1000
+        assert ledger._get_effective_max_conversation_tokens("test") == expected
         ledger.db_conn.close()
 
-    def test_effective_limit_uses_smaller_plugin_limit(self, temp_dir):
-        """插件侧上限更小时，使用插件上限触发压缩"""
-        ledger = _create_ledger(
-            temp_dir,
-            astr_context=MockAstrContext(max_context_tokens=1000000),
-            max_conversation_tokens=100000,
-            context_forgetting_timeout=0,
-        )
-
-        assert ledger._get_effective_max_conversation_tokens("test") == 100000
-        ledger.db_conn.close()
+    def test_effective_limit_skips_debug_when_disabled(self, temp_dir, monkeypatch):
+        """未开调试日志时，上限判断不构造调试文本"""
+        import core.conversation_ledger as ledger_module
 
-    def test_zero_plugin_limit_falls_back_to_provider_limit(self, temp_dir):
-        """插件配置为0时，不限制插件侧上限，改用模型上限"""
+        fake_logger = MagicMock()
+        fake_logger.isEnabledFor.return_value = False
+        monkeypatch.setattr(ledger_module, "logger", fake_logger)
         ledger = _create_ledger(
             temp_dir,
-            astr_context=MockAstrContext(max_context_tokens=2048),
-            max_conversation_tokens=0,
+            astr_context=MockAstrContext(max_context_tokens=1000),
+            max_conversation_tokens=5000,
             context_forgetting_timeout=0,
         )
 
-        assert ledger._get_effective_max_conversation_tokens("test") == 2048
+        assert ledger._get_effective_max_conversation_tokens("test") == 1000
+        fake_logger.debug.assert_not_called()
         ledger.db_conn.close()
 
     def test_no_compression_below_threshold(self, temp_dir):
@@ -226,9 +259,12 @@ class TestCompressionTrigger:
         finally:
             ledger.db_conn.close()
 
-    def test_forgetting_timeout_triggers_compression(self, temp_dir):
+    def test_forgetting_timeout_triggers_compression(self, temp_dir, monkeypatch):
         """遗忘时间超限时强制触发压缩"""
         from core.conversation_ledger import ConversationLedger
+        clock = FakeClock(BASE_TIME)
+        monkeypatch.setattr(time, "time", clock)
+        monkeypatch.setattr(time, "monotonic", clock)
         config = MockConfigManager(
             max_conversation_tokens=100000,  # 高阈值，不会因Token触发
             context_forgetting_timeout=1,  # 1秒超时，方便测试
@@ -238,15 +274,15 @@ class TestCompressionTrigger:
         ledger = ConversationLedger(config, temp_dir)
 
         chat_id = "test_chat"
-        base_time = time.time() - 10  # 10秒前的消息
+        base_time = BASE_TIME - 10  # 10秒前的消息
 
         for i in range(20):
             ledger.add_message(chat_id, make_long_message(
                 "user", base_time + i, char_count=200
             ))
 
-        # 等待超过遗忘时间
-        time.sleep(1.1)
+        # 推进时钟超过遗忘时间（不真实等待）
+        clock.advance(1.1)
 
         # 再添加一条消息触发检查
         ledger.add_message(chat_id, make_message(
@@ -487,6 +523,9 @@ class TestConcurrency:
                     )
                 return real_lock.release()
 
+            def read(self):
+                return real_lock.read()
+
             def __enter__(self):
                 self.acquire()
                 return self
@@ -523,6 +562,26 @@ class TestConcurrency:
             for roles in release_snapshots
         )
 
+    def test_existing_chat_lookup_skips_write_lock(self, temp_dir):
+        """已存在会话的账本查找不经过全局写锁"""
+        ledger = _create_ledger(temp_dir, max_conversation_tokens=100000)
+        chat_id = "FriendMessage:lookup"
+        ledger.add_message(chat_id, make_message("user", "hi", time.time()))
+        found = []
+
+        assert ledger._lock.acquire(timeout=1)
+        try:
+            t = threading.Thread(
+                target=lambda: found.append(ledger._get_or_create_ledger(chat_id))
+            )
+            t.start()
+            t.join(timeout=1)
+            # 持有写锁期间查找已完成，说明未经过写锁
+            assert found and found[0] is ledger._ledgers[chat_id]
+        finally:
+            ledger._lock.release()
+        t.join()
+
     def test_concurrent_compression_and_read(self, temp_dir):
         """压缩和读取并发不会崩溃"""
         from core.conversation_ledger import ConversationLedger
@@ -628,6 +687,101 @@ class TestCacheHitEffectiveness:
         assert [message["source_message_id"] for message in recent] == ["m1", "m2"]
         assert [message["source_message_id"] for message in raw_recent] == ["m1", "m2"]
 
+    def test_add_message_keeps_order_and_normalizes_int_timestamps(self, temp_dir):
+        from core.conversation_ledger import ConversationLedger
+
+        ledger = ConversationLedger(MockConfigManager(max_conversation_tokens=100000), temp_dir)
+        chat_id = "ordering"
+        for ts in (1, 3, 2, 3.0, 0.5):
+            ledger.add_message(chat_id, {"role": "user", "content": str(ts), "timestamp": ts})
+
+        messages = ledger.get_all_messages(chat_id)
+        assert [m["content"] for m in messages] == ["0.5", "1", "2", "3", "3.0"]
+        assert all(type(m["timestamp"]) is float for m in messages)
+
+    def test_repeated_sender_fields_share_one_string(self, temp_dir):
+        """高重复字段入账时驻留，不同消息的同值字段是同一对象"""
+        ledger = _create_ledger(temp_dir, max_conversation_tokens=100000)
+        chat_id = "FriendMessage:intern"
+        for i in range(2):
+            ledger.add_message(chat_id, {
+                "role": "user",
+                "content": "hi",
+                "sender_name": "".join(["小", "明"]),
+                "timestamp": float(i),
+            })
+
+        first, second = ledger.get_all_messages(chat_id)
+        assert first["sender_name"] is second["sender_name"]
+        assert first["chat_id"] is second["chat_id"]
+
+    def test_out_of_order_batch_matches_single_inserts(self, temp_dir):
+        """乱序批量入账与逐条插入结果一致（同时间戳保持先来后到）"""
+        batch_ledger = _create_ledger(temp_dir, max_conversation_tokens=100000)
+        single_ledger = _create_ledger(temp_dir, max_conversation_tokens=100000)
+        chat_id = "FriendMessage:batch_order"
+        existing = [(1, "a"), (3, "b"), (5, "c")]
+        batch = [(4, "d"), (3, "e"), (6, "f"), (0.5, "g"), (3, "h")]
+
+        for ledger in (batch_ledger, single_ledger):
+            ledger.add_messages(chat_id, [
+                {"role": "user", "content": c, "timestamp": ts} for ts, c in existing
+            ])
+        batch_ledger.add_messages(chat_id, [
+            {"role": "user", "content": c, "timestamp": ts} for ts, c in batch
+        ])
+        for ts, c in batch:
+            single_ledger.add_message(chat_id, {"role": "user", "content": c, "timestamp": ts})
+
+        expected = ["g", "a", "b", "e", "h", "d", "c", "f"]
+        assert [m["content"] for m in batch_ledger.get_all_messages(chat_id)] == expected
+        assert [m["content"] for m in single_ledger.get_all_messages(chat_id)] == expected
+        assert batch_ledger._estimate_tokens(chat_id) == single_ledger._estimate_tokens(chat_id)
+
+    def test_get_messages_through_returns_prefix_copy(self, temp_dir):
+        from core.conversation_ledger import ConversationLedger
+
+        ledger = ConversationLedger(MockConfigManager(max_conversation_tokens=100000), temp_dir)
+        chat_id = "prefix_copy"
+        for index in range(50):
+            ledger.add_message(
+                chat_id,
+                {
+                    "role": "user",
+                    "content": f"消息{index}",
+                    "source_message_id": f"m{index}",
+                    "timestamp": float(index + 1),
+                },
+            )
+
+        prefix = ledger.get_messages_through(chat_id, "m47")
+        prefix.clear()
+
+        assert [m["source_message_id"] for m in ledger.get_messages_through(chat_id, "m47")][-2:] == ["m46", "m47"]
+        assert len(ledger.get_messages_through(chat_id, "m47")) == 48
+        assert len(ledger.get_messages_through(chat_id)) == 50
+
+    def test_duplicate_boundary_id_cuts_at_latest_match(self, temp_dir):
+        """source_message_id 重复时以最新一条为边界（从尾部向前定位）。"""
+        from core.conversation_ledger import ConversationLedger
+
+        ledger = ConversationLedger(MockConfigManager(max_conversation_tokens=10000), temp_dir)
+        chat_id = "duplicate_boundary"
+        for index, message_id in enumerate(["m1", "dup", "m2", "dup", "m3"]):
+            ledger.add_message(
+                chat_id,
+                {
+                    "role": "user",
+                    "content": f"消息{index}",
+                    "source_message_id": message_id,
+                    "timestamp": float(index + 1),
+                },
+            )
+
+        prefix = ledger.get_messages_through(chat_id, "dup")
+
+        assert [m["content"] for m in prefix] == ["消息0", "消息1", "消息2", "消息3"]
+
     def test_missing_message_boundary_refuses_to_expand(self, temp_dir):
         from core.conversation_ledger import ConversationLedger
 
@@ -791,6 +945,22 @@ class TestStressScenarios:
             assert len(messages) < 50, f"{chat_id} 应被压缩"
             assert len(messages) >= ledger.MIN_RETAIN_COUNT
 
+    def test_total_message_limit_drops_oldest_across_chats(self, temp_dir):
+        """跨会话总量超限时，按全局时间从各会话头部删除最旧消息"""
+        ledger = _create_ledger(temp_dir, max_conversation_tokens=0)
+        ledger.TOTAL_MESSAGE_LIMIT = 5
+
+        for i in range(4):
+            ledger.add_message("FriendMessage:a", make_message("user", f"a{i}", 100.0 + i * 2))
+            ledger.add_message("FriendMessage:b", make_message("user", f"b{i}", 101.0 + i * 2))
+
+        assert [m["content"] for m in ledger.get_all_messages("FriendMessage:a")] == ["a2", "a3"]
+        assert [m["content"] for m in ledger.get_all_messages("FriendMessage:b")] == [
+            "b1",
+            "b2",
+            "b3",
+        ]
+
     def test_empty_chat_no_crash(self, temp_dir):
         """空会话不崩溃"""
         from core.conversation_ledger import ConversationLedger
@@ -860,42 +1030,26 @@ class TestStressScenarios:
 class TestTokenEstimation:
     """测试Token估算的准确性"""
 
-    def test_chinese_text_estimation(self, temp_dir):
+    def test_chinese_text_estimation(self, estimator):
         """中文文本Token估算"""
-        from core.conversation_ledger import ConversationLedger
-        config = MockConfigManager(max_conversation_tokens=100000)
-        ledger = ConversationLedger(config, temp_dir)
-
         # 100个中文字符 ≈ 60 tokens
-        tokens = ledger._count_tokens_in_text("你" * 100)
+        tokens = estimator._count_tokens_in_text("你" * 100)
         assert 50 <= tokens <= 70, f"100个中文字符应约60 tokens，实际 {tokens}"
 
-    def test_english_text_estimation(self, temp_dir):
+    def test_english_text_estimation(self, estimator):
         """英文文本Token估算"""
-        from core.conversation_ledger import ConversationLedger
-        config = MockConfigManager(max_conversation_tokens=100000)
-        ledger = ConversationLedger(config, temp_dir)
-
         # 100个英文字符 ≈ 30 tokens
-        tokens = ledger._count_tokens_in_text("a" * 100)
+        tokens = estimator._count_tokens_in_text("a" * 100)
         assert 25 <= tokens <= 35, f"100个英文字符应约30 tokens，实际 {tokens}"
 
-    def test_message_token_counting(self, temp_dir):
+    def test_message_token_counting(self, estimator):
         """单条消息Token计数"""
-        from core.conversation_ledger import ConversationLedger
-        config = MockConfigManager(max_conversation_tokens=100000)
-        ledger = ConversationLedger(config, temp_dir)
-
         msg = make_message("user", "测试消息" * 50, time.time(), sender_name="张三")
-        tokens = ledger._count_message_tokens(msg)
+        tokens = estimator._count_message_tokens(msg)
         assert tokens > 0, "消息Token数应大于0"
 
-    def test_image_message_token_counting(self, temp_dir):
+    def test_image_message_token_counting(self, estimator):
         """图片消息Token计数"""
-        from core.conversation_ledger import ConversationLedger
-        config = MockConfigManager(max_conversation_tokens=100000)
-        ledger = ConversationLedger(config, temp_dir)
-
         msg = {
             "role": "user",
             "content": [
@@ -905,10 +1059,68 @@ class TestTokenEstimation:
             "timestamp": time.time(),
             "is_processed": False,
         }
-        tokens = ledger._count_message_tokens(msg)
+        tokens = estimator._count_message_tokens(msg)
         # 应包含文本token + 85(图片)
         assert tokens >= 85, f"图片消息至少85 tokens，实际 {tokens}"
 
+    def test_cached_estimate_matches_full_recount(self, temp_dir):
+        """增量累加的估算与全量重算一致，改写消息后缓存失效"""
+        ledger = _create_ledger(temp_dir, max_conversation_tokens=100000)
+        chat_id = "FriendMessage:estimate"
+        base_time = time.time()
+        ledger.add_message(chat_id, {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "看图"},
+                {"type": "image_url", "image_url": {"url": "data:image/png;base64,abc"}},
+            ],
+            "timestamp": base_time,
+        })
+        ledger.add_messages(chat_id, [
+            make_message("user", f"消息{i}" * 10, base_time + 1 + i) for i in range(5)
+        ])
+
+        def full_recount():
+            return sum(
+                ledger._count_message_tokens(m) for m in ledger.get_all_messages(chat_id)
+            )
+
+        assert ledger._estimate_tokens(chat_id) == full_recount()
+
+        version = ledger._ledgers[chat_id]["version"]
+        ledger.add_caption_to_message(chat_id, base_time, "一只猫")
+        assert ledger._ledgers[chat_id]["token_estimate"] is None
+        assert ledger._ledgers[chat_id]["version"] == version + 1
+        assert ledger._estimate_tokens(chat_id) == full_recount()
+
+    @pytest.mark.asyncio
+    async def test_expired_image_marking_bumps_version(self, temp_dir):
+        """过期图片原地改写与转述写入同样作废估算缓存并递增版本。"""
+        ledger = _create_ledger(temp_dir)
+        chat_id = "FriendMessage:expired"
+        base_time = time.time()
+        ledger.add_message(chat_id, {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "看图"},
+                {"type": "image_url", "image_url": {"url": "data:image/png;base64,abc"}},
+            ],
+            "timestamp": base_time,
+        })
+        ledger.add_messages(chat_id, [
+            make_message("user", f"消息{i}", base_time + 1 + i) for i in range(8)
+        ])
+        ledger._estimate_tokens(chat_id)
+        version = ledger._ledgers[chat_id]["version"]
+
+        astr_context = MagicMock()
+        await ledger.generate_captions_for_chat(chat_id, "vision", astr_context)
+
+        marked = ledger.get_all_messages(chat_id)[0]
+        assert marked["image_caption"] == ledger.EXPIRED_IMAGE_CAPTION
+        assert ledger._ledgers[chat_id]["token_estimate"] is None
+        assert ledger._ledgers[chat_id]["version"] == version + 1
+
 
 class TestCompressionTimestamp:
     """测试压缩时间戳记录"""
@@ -936,9 +1148,11 @@ class TestCompressionTimestamp:
         assert chat_id in ledger._last_compression_time
         assert ledger._last_compression_time[chat_id] > 0
 
-    def test_subsequent_compression_updates_timestamp(self, temp_dir):
+    def test_subsequent_compression_updates_timestamp(self, temp_dir, monkeypatch):
         """后续压缩更新时间戳"""
         from core.conversation_ledger import ConversationLedger
+        clock = FakeClock(BASE_TIME)
+        monkeypatch.setattr(time, "monotonic", clock)
         config = MockConfigManager(
             max_conversation_tokens=500,
             context_content_retain_tokens=200,
@@ -956,7 +1170,7 @@ class TestCompressionTimestamp:
 
         first_ts = ledger._last_compression_time.get(chat_id, 0)
 
-        time.sleep(0.1)
+        clock.advance(0.1)
 
         # 第二次压缩
         for i in range(50):
@@ -967,6 +1181,45 @@ class TestCompressionTimestamp:
         second_ts = ledger._last_compression_time.get(chat_id, 0)
         assert second_ts > first_ts, "后续压缩应更新时间戳"
 
+    def test_summary_and_forgetting_reads_skip_lock(self, temp_dir):
+        """摘要与遗忘判断只读单值，持有写锁期间也能完成"""
+        ledger = _create_ledger(temp_dir, context_forgetting_timeout=60)
+        chat_id = "FriendMessage:lockfree"
+        ledger.add_message(chat_id, make_message("user", "hi", time.time() - 120))
+        ledger.set_current_summary(chat_id, "摘要")
+        results = []
+
+        assert ledger._lock.acquire(timeout=1)
+        try:
+            t = threading.Thread(
+                target=lambda: results.extend(
+                    [
+                        ledger.get_current_summary(chat_id),
+                        ledger._is_forgetting_timeout(chat_id),
+                    ]
+                )
+            )
+            t.start()
+            t.join(timeout=1)
+            assert results == ["摘要", True]
+        finally:
+            ledger._lock.release()
+        t.join()
+
+    def test_forgetting_interval_ignores_wall_clock_jump(self, temp_dir, monkeypatch):
+        """压缩后的遗忘间隔按单调时钟计算，系统时间跳变不会误触发"""
+        ledger = _create_ledger(temp_dir, context_forgetting_timeout=3600)
+        chat_id = "FriendMessage:clock"
+        ledger.add_message(chat_id, make_message("user", "hi", time.time()))
+        ledger.set_current_summary(chat_id, "旧摘要")
+        assert ledger.organize_context(chat_id, mode="private_fallback")
+        assert chat_id in ledger._last_compression_time
+
+        real_time = time.time
+        monkeypatch.setattr(time, "time", lambda: real_time() + 7 * 86400)
+
+        assert ledger._is_forgetting_timeout(chat_id) is False
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -3,9 +3,7 @@
 from __future__ import annotations
 
 import sys
-import types
 from pathlib import Path
-from unittest.mock import MagicMock, AsyncMock
 
 import pytest
 
@@ -15,28 +13,12 @@ _PARENT = str(PLUGIN_ROOT.parent)
 if _PARENT not in sys.path:
     sys.path.insert(0, _PARENT)
 
-for _mod_path in (
-    "astrbot",
-    "astrbot.api",
-    "astrbot.api.event",
-    "astrbot.core",
-    "astrbot.core.agent",
-    "astrbot.core.agent.message",
-    "astrbot.core.message",
-    "astrbot.core.message.components",
-    "astrbot.core.star",
-    "astrbot.core.star.context",
-):
-    sys.modules.setdefault(_mod_path, types.ModuleType(_mod_path))
-
-sys.modules["astrbot.api"].logger = MagicMock()
-sys.modules["astrbot.api.event"].MessageChain = MagicMock
-sys.modules["astrbot.core.message.components"].Plain = type("Plain", (), {})
-sys.modules["astrbot.core.message.components"].At = type("At", (), {})
-sys.modules["astrbot.core.star.context"].Context = type("Context", (), {})
-
 from astrbot_plugin_angel_heart.core.config_manager import ConfigManager
 from astrbot_plugin_angel_heart.core.conversation_ledger import ConversationLedger
+from astrbot_plugin_angel_heart.core.utils.context_utils import (
+    partition_dialogue,
+    partition_dialogue_raw,
+)
 
 
 class DummyConfig(ConfigManager):
@@ -100,6 +82,58 @@ class TestGroupRuleOrganize:
         # 群聊工具应被丢掉
         assert all(m.get("role") != "tool" for m in formal[1:])
 
+    def test_write_during_planning_is_not_lost(self, ledger):
+        chat_id = "FriendMessage:replan"
+        ledger.add_messages(chat_id, [_msg(i, f"m{i}", chat_id=chat_id) for i in range(1, 5)])
+        ledger.set_current_summary(chat_id, "旧摘要")
+        real_plan = ledger._plan_rule_organize
+        calls = []
+
+        def plan_with_concurrent_write(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                # 模拟锁外计算期间另一线程入账
+                ledger.add_message(chat_id, _msg(50, "late", chat_id=chat_id))
+            return real_plan(*args, **kwargs)
+
+        ledger._plan_rule_organize = plan_with_concurrent_write
+        assert ledger.organize_context(chat_id, mode="private_fallback") is True
+
+        assert len(calls) == 2
+        assert ledger.get_all_messages(chat_id)[-1]["content"] == "late"
+
+    def test_caption_during_planning_is_not_published_stale(self, ledger):
+        chat_id = "FriendMessage:caption_replan"
+        image_msg = _msg(1, [
+            {"type": "text", "text": "看图"},
+            {"type": "image_url", "image_url": {"url": "data:image/png;base64,abc"}},
+        ], chat_id=chat_id)
+        ledger.add_messages(
+            chat_id, [image_msg] + [_msg(i, f"m{i}", chat_id=chat_id) for i in range(2, 5)]
+        )
+        ledger.set_current_summary(chat_id, "旧摘要")
+        real_plan = ledger._plan_rule_organize
+        snapshots = []
+
+        def plan_with_concurrent_caption(messages, *args, **kwargs):
+            snapshots.append(messages)
+            if len(snapshots) == 1:
+                # 模拟锁外计算期间另一线程写入转述（原地改写消息字典）
+                live = ledger._ledgers[chat_id]["messages"]
+                assert all(a is not b for a, b in zip(messages, live))
+                assert ledger.add_caption_to_message(chat_id, 1.0, "一只猫")
+                assert "image_caption" not in messages[0]
+            return real_plan(messages, *args, **kwargs)
+
+        ledger._plan_rule_organize = plan_with_concurrent_caption
+        assert ledger.organize_context(chat_id, mode="private_fallback") is True
+
+        # 转述递增了版本：发布前在写锁内基于最新内容重算
+        assert len(snapshots) == 2
+        captioned = [m for m in ledger.get_all_messages(chat_id) if m.get("timestamp") == 1.0]
+        assert captioned and captioned[0]["image_caption"] == "一只猫"
+        assert all(item.get("type") != "image_url" for item in captioned[0]["content"])
+
     def test_group_enter_keeps_from_timestamp(self, ledger):
         chat_id = "GroupMessage:2"
         for i in range(1, 8):
@@ -114,6 +148,51 @@ class TestGroupRuleOrganize:
         body = [m for m in msgs if m.get("kind") != "context_summary"]
         assert all(m.get("timestamp", 0) >= 8.0 for m in body)
 
+    def test_private_summary_keeps_from_timestamp(self, ledger):
+        chat_id = "FriendMessage:keep"
+        for i in range(1, 12):
+            ledger.add_message(chat_id, _msg(i, f"m{i}", chat_id=chat_id))
+
+        ok = ledger.organize_context(
+            chat_id, mode="private_llm", llm_summary="摘要", keep_from_timestamp=8.0
+        )
+        assert ok is True
+        body = [
+            m for m in ledger.get_all_messages(chat_id) if m.get("kind") != "context_summary"
+        ]
+        assert [m["timestamp"] for m in body] == [8.0, 9.0, 10.0, 11.0]
+
+    def test_private_summary_keep_count_skips_old_summary(self, ledger):
+        chat_id = "FriendMessage:keep_count"
+        for i in range(1, 6):
+            ledger.add_message(chat_id, _msg(i, f"m{i}", chat_id=chat_id))
+        ledger.organize_context(chat_id, mode="private_llm", llm_summary="旧摘要", keep_from_timestamp=4.0)
+        ledger.add_message(chat_id, _msg(6, "m6", chat_id=chat_id))
+
+        assert ledger._commit_summary_and_block(
+            chat_id, summary_text="新摘要", keep_tools=True, keep_count=2
+        )
+
+        messages = ledger.get_all_messages(chat_id)
+        assert messages[0]["content"] == "[当前摘要]\n新摘要"
+        assert [m["content"] for m in messages[1:]] == ["m5", "m6"]
+
+    def test_add_caption_locates_message_by_timestamp(self, ledger):
+        chat_id = "FriendMessage:caption"
+        for i in range(1, 30):
+            ledger.add_message(chat_id, _msg(i, f"m{i}", chat_id=chat_id))
+
+        assert ledger.add_caption_to_message(chat_id, 17.0004, "一只猫") is True
+        assert ledger.add_caption_to_message(chat_id, 17.5, "不存在") is False
+        captioned = [m for m in ledger.get_all_messages(chat_id) if m.get("image_caption")]
+        assert [(m["timestamp"], m["image_caption"]) for m in captioned] == [(17.0, "一只猫")]
+
+    def test_set_messages_restores_timestamp_order(self, ledger):
+        chat_id = "GroupMessage:set"
+        ledger.set_messages(chat_id, [_msg(3, "c"), _msg(1, "a"), _msg(2, "b")])
+
+        assert [m["content"] for m in ledger.get_all_messages(chat_id)] == ["a", "b", "c"]
+
     def test_group_min_retain_fallback_drops_tools(self, ledger):
         """正文不足 MIN_RETAIN 时 fallback 也不得把 tool 塞回连续块。"""
         chat_id = "GroupMessage:toolfb"
@@ -173,29 +252,71 @@ class TestPrivateLlmCompress:
         assert ledger.get_current_summary(chat_id)
 
 
-class TestPartitionIncludesSummary:
-    def test_partition_dialogue_prefixes_summary(self, ledger):
-        from astrbot_plugin_angel_heart.core.utils.context_utils import (
-            partition_dialogue,
-            partition_dialogue_raw,
-        )
+class FakeLedger:
+    """切分函数只读取消息副本与当前摘要，用列表替身跳过真实账本的入账整理。"""
+
+    def __init__(self, messages, summary=""):
+        self.messages = list(messages)
+        self.summary = summary
+
+    def get_messages_through(self, chat_id, boundary_message_id=""):
+        return self.messages.copy()
 
+    def get_current_summary(self, chat_id):
+        return self.summary
+
+
+class TestPartitionIncludesSummary:
+    def test_partition_dialogue_prefixes_summary(self):
         chat_id = "GroupMessage:3"
-        for i in range(1, 6):
-            m = _msg(i, f"m{i}", chat_id=chat_id)
-            ledger.add_message(chat_id, m)
-        ledger.set_current_summary(chat_id, "历史已收口")
+        fake = FakeLedger(
+            [_msg(i, f"m{i}", chat_id=chat_id) for i in range(1, 6)],
+            summary="历史已收口",
+        )
 
-        hist, recent, ts = partition_dialogue(ledger, chat_id)
+        hist, recent, ts = partition_dialogue(fake, chat_id)
         assert hist
         assert hist[0]["kind"] == "context_summary"
         assert "历史已收口" in hist[0]["content"]
         assert recent
         assert ts > 0
 
-        hist2, recent2, _ = partition_dialogue_raw(ledger, chat_id)
+        hist2, recent2, _ = partition_dialogue_raw(fake, chat_id)
         assert hist2[0]["kind"] == "context_summary"
 
+    def test_partition_dialogue_drops_tools_but_raw_keeps_them(self):
+        chat_id = "FriendMessage:tools"
+        fake = FakeLedger(
+            [
+                _msg(1, "问", chat_id=chat_id),
+                _msg(2, "结果", tool=True, chat_id=chat_id),
+                _msg(3, "答", role="assistant", chat_id=chat_id),
+            ]
+        )
+
+        hist, recent, ts = partition_dialogue(fake, chat_id)
+        assert hist == []
+        assert [m["content"] for m in recent] == ["问", "答"]
+        assert ts == 3.0
+
+        _, raw_recent, _ = partition_dialogue_raw(fake, chat_id)
+        assert [m["role"] for m in raw_recent] == ["user", "tool", "assistant"]
+
+    def test_partition_raw_splits_summary_without_touching_ledger(self, ledger):
+        chat_id = "FriendMessage:partition"
+        ledger.add_messages(chat_id, [_msg(i, f"m{i}", chat_id=chat_id) for i in range(1, 4)])
+        ledger.set_current_summary(chat_id, "收口")
+        summary_msg = ledger.get_formal_context(chat_id)[0]
+        ledger.add_message(chat_id, summary_msg)
+        before = ledger.get_all_messages(chat_id)
+
+        hist, recent, ts = partition_dialogue_raw(ledger, chat_id)
+
+        assert hist == [summary_msg]
+        assert [m["content"] for m in recent] == ["m1", "m2", "m3"]
+        assert ts == 3.0
+        assert ledger.get_all_messages(chat_id) == before
+
 
 class TestCompressionLock:
     def test_concurrent_organize_skips_second(self, ledger):
@@ -19,7 +19,7 @@ import sys
 import time
 import types
 from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, call
 
 import pytest
 
@@ -29,27 +29,6 @@ _PARENT = str(PLUGIN_ROOT.parent)
 if _PARENT not in sys.path:
     sys.path.insert(0, _PARENT)
 
-for _mod_path in (
-    "astrbot",
-    "astrbot.api",
-    "astrbot.api.event",
-    "astrbot.core",
-    "astrbot.core.agent",
-    "astrbot.core.agent.message",
-    "astrbot.core.message",
-    "astrbot.core.message.components",
-    "astrbot.core.star",
-    "astrbot.core.star.context",
-):
-    sys.modules.setdefault(_mod_path, types.ModuleType(_mod_path))
-
-# AstrBot 兼容导入留桩
-sys.modules["astrbot.api"].logger = MagicMock()
-sys.modules["astrbot.api.event"].MessageChain = MagicMock
-sys.modules["astrbot.core.message.components"].Plain = type("Plain", (), {})
-sys.modules["astrbot.core.message.components"].At = type("At", (), {})
-sys.modules["astrbot.core.star.context"].Context = type("Context", (), {})
-
 from astrbot_plugin_angel_heart.core.config_manager import ConfigManager
 from astrbot_plugin_angel_heart.core.debounce_manager import (
     ChatEnergyState,
@@ -1124,8 +1103,8 @@ class TestEventWakeDetection:
         e._messages = [Reply()]
         assert self.checker.is_event_wake(e) is False
 
-    def test_cache_message_writes_hits_from_plain_body_only(self):
-        import asyncio
+    @pytest.mark.asyncio
+    async def test_cache_message_writes_hits_from_plain_body_only(self):
         from types import SimpleNamespace
         from astrbot_plugin_angel_heart.roles.front_desk import FrontDesk
 
@@ -1170,15 +1149,17 @@ class TestEventWakeDetection:
             lambda: "[引用消息(草王: 草王帮我分析)] @草王 今天天气不错"
         )
 
-        asyncio.run(fd.cache_message("group:1", event))
+        await fd.cache_message("group:1", event)
         cached = angel.conversation_ledger.add_message.call_args.args[1]
         assert cached["metadata"]["body_text"] == "今天天气不错"
         assert cached["metadata"]["hits"] == []
         assert event.get_extra("angelheart_message_metadata")["hits"] == []
+        # 不含图片/文件的消息直接存字符串，不再包一层多模态列表
+        assert cached["content"] == "[引用消息(草王: 草王帮我分析)] @草王 今天天气不错"
 
         event2 = DummyEvent("hit-2", message_str="")
         event2._messages = [Plain("草王帮我分析一下")]
-        asyncio.run(fd.cache_message("group:1", event2))
+        await fd.cache_message("group:1", event2)
         cached2 = angel.conversation_ledger.add_message.call_args.args[1]
         assert cached2["metadata"]["body_text"] == "草王帮我分析一下"
         hit_types = {item["type"] for item in cached2["metadata"]["hits"]}
@@ -1233,15 +1214,43 @@ class TestEventWakeDetection:
         assert dense_only_checker.get_leave_reply_trigger("g1") == "dense_conversation"
         dense_only_checker._detect_echo_chamber.assert_not_called()
 
+
+def _observe_decision(**overrides) -> SecretaryDecision:
+    fields = dict(
+        should_reply=False,
+        reply_strategy="继续观察",
+        topic="t",
+        entities=[],
+        facts=[],
+        keywords=[],
+    )
+    fields.update(overrides)
+    return SecretaryDecision(**fields)
+
+
 class TestSecretaryActivation:
-    @pytest.mark.asyncio
-    async def test_must_reply_forces_true_when_force_enabled(self):
+    """秘书对象图只读：整类共用一个实例，每个用例前复位 mock 与配置。"""
+
+    @classmethod
+    def setup_class(cls):
         from astrbot_plugin_angel_heart.roles.secretary import Secretary
 
-        config = make_config()
-        angel = MagicMock()
-        angel.get_chat_status.return_value = AngelHeartStatus.OBSERVATION
-        angel.is_present.return_value = True
+        cls.config = make_config()
+        cls.angel = MagicMock()
+        cls.secretary = Secretary(cls.config, MagicMock(), cls.angel)
+        cls.secretary.perform_analysis = AsyncMock()
+
+    def setup_method(self):
+        self.angel.reset_mock(return_value=True, side_effect=True)
+        self.secretary.perform_analysis.reset_mock(return_value=True)
+        self.secretary.config_manager = self.config
+        self.angel.get_chat_status.return_value = AngelHeartStatus.OBSERVATION
+        self.angel.is_present.return_value = True
+        self.angel.status_transition_manager.transition_to_status = AsyncMock()
+
+    @pytest.mark.asyncio
+    async def test_must_reply_forces_true_when_force_enabled(self):
+        angel = self.angel
         angel.debounce_manager.get_must_reply.return_value = True
         angel.debounce_manager.get_debounce_kind.return_value = "assistant"
         angel.debounce_manager.get_end_message_id.return_value = "boundary-2"
@@ -1250,24 +1259,12 @@ class TestSecretaryActivation:
             [{"role": "user", "content": "new"}],
             1.0,
         )
-        angel.status_transition_manager.transition_to_status = AsyncMock()
-
-        secretary = Secretary(config, MagicMock(), angel)
-        secretary.perform_analysis = AsyncMock(
-            return_value=SecretaryDecision(
-                should_reply=False,
-                is_questioned=False,
-                is_interesting=False,
-                reply_strategy="继续观察",
-                topic="t",
-                entities=[],
-                facts=[],
-                keywords=[],
-            )
+        self.secretary.perform_analysis.return_value = _observe_decision(
+            is_questioned=False, is_interesting=False
         )
 
         event = DummyEvent("s", message_str="草王帮我看下")
-        decision = await secretary.handle_message_by_state(event)
+        decision = await self.secretary.handle_message_by_state(event)
         angel.conversation_ledger.get_context_snapshot.assert_called_once_with(
             event.unified_msg_origin, "boundary-2"
         )
@@ -1277,14 +1274,10 @@ class TestSecretaryActivation:
 
     @pytest.mark.asyncio
     async def test_must_reply_ignores_force_reply_configuration(self):
-        from astrbot_plugin_angel_heart.roles.secretary import Secretary
-
-        config = make_config(
+        self.secretary.config_manager = make_config(
             wake_reply_overrides={"force_reply_when_summoned": False}
         )
-        angel = MagicMock()
-        angel.get_chat_status.return_value = AngelHeartStatus.OBSERVATION
-        angel.is_present.return_value = True
+        angel = self.angel
         angel.debounce_manager.get_must_reply.return_value = True
         angel.debounce_manager.get_debounce_kind.return_value = "secretary"
         angel.debounce_manager.get_end_message_id.return_value = "boundary-1"
@@ -1293,80 +1286,45 @@ class TestSecretaryActivation:
             [{"role": "user", "content": "被点名"}],
             1.0,
         )
-        angel.status_transition_manager.transition_to_status = AsyncMock()
-
-        secretary = Secretary(config, MagicMock(), angel)
-        secretary.perform_analysis = AsyncMock(
-            return_value=SecretaryDecision(
-                should_reply=False,
-                is_questioned=False,
-                is_interesting=False,
-                reply_strategy="继续观察",
-                topic="t",
-                entities=[],
-                facts=[],
-                keywords=[],
-            )
+        self.secretary.perform_analysis.return_value = _observe_decision(
+            is_questioned=False, is_interesting=False
         )
 
-        decision = await secretary.handle_message_by_state(DummyEvent("mention"))
+        decision = await self.secretary.handle_message_by_state(DummyEvent("mention"))
         assert decision.should_reply is True
         assert decision.reply_strategy == "必须回应"
 
     @pytest.mark.asyncio
     async def test_empty_message_str_no_longer_short_circuits(self):
         """正文只认 ledger/outline；秘书不再用 message_str 判空短路。"""
-        from astrbot_plugin_angel_heart.roles.secretary import Secretary
-
-        config = make_config()
-        angel = MagicMock()
-        angel.get_chat_status.return_value = AngelHeartStatus.OBSERVATION
-        angel.is_present.return_value = True
+        angel = self.angel
         angel.debounce_manager.get_must_reply.return_value = False
         angel.debounce_manager.get_debounce_kind.return_value = "secretary"
-        angel.status_transition_manager.transition_to_status = AsyncMock()
         angel.conversation_ledger.get_context_snapshot.return_value = (
             [],
             [{"role": "user", "content": "@bot"}],
             1.0,
         )
         angel.work_ledger.format_for_secretary.return_value = ""
-
-        secretary = Secretary(config, MagicMock(), angel)
-        secretary.perform_analysis = AsyncMock(
-            return_value=SecretaryDecision(
-                should_reply=False,
-                reply_strategy="继续观察",
-                topic="t",
-                entities=[],
-                facts=[],
-                keywords=[],
-            )
-        )
+        self.secretary.perform_analysis.return_value = _observe_decision()
 
         event = DummyEvent("empty", message_str="   ")
-        decision = await secretary.handle_message_by_state(event)
+        decision = await self.secretary.handle_message_by_state(event)
         assert decision.reply_strategy == "继续观察"
-        secretary.perform_analysis.assert_called_once()
+        self.secretary.perform_analysis.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_no_recent_dialogue_skips(self):
-        from astrbot_plugin_angel_heart.roles.secretary import Secretary
-
-        config = make_config()
-        angel = MagicMock()
-        angel.get_chat_status.return_value = AngelHeartStatus.OBSERVATION
-        angel.is_present.return_value = True
+        angel = self.angel
         angel.debounce_manager.get_must_reply.return_value = True
         angel.debounce_manager.get_debounce_kind.return_value = "assistant"
         angel.conversation_ledger.get_context_snapshot.return_value = ([], [], 0)
-        angel.status_transition_manager.transition_to_status = AsyncMock()
 
-        secretary = Secretary(config, MagicMock(), angel)
         event = DummyEvent("none", message_str="草王")
-        decision = await secretary.handle_message_by_state(event)
+        decision = await self.secretary.handle_message_by_state(event)
         assert decision.should_reply is False
         assert decision.reply_strategy == "无新消息"
+        self.secretary.perform_analysis.assert_not_called()
 
 
 class TestMessageIdFlow:
@@ -1376,7 +1334,7 @@ class TestMessageIdFlow:
 
         angel = MagicMock()
         angel.astr_context = MagicMock()
-        angel.conversation_ledger.add_message = MagicMock()
+        angel.conversation_ledger = MagicMock(spec_set=["add_message"])
         fd = FrontDesk(make_config(), angel)
         event = DummyEvent("native-message-id")
 
@@ -1426,14 +1384,13 @@ class TestMessageIdFlow:
         await fd._execute_secretary_decision(decision, event, event.unified_msg_origin)
 
         angel.conversation_ledger.get_context_snapshot.assert_not_called()
-        fd._process_decision_result.assert_awaited_once_with(
-            decision,
-            recent,
-            historical,
-            2.0,
-            event,
-            event.unified_msg_origin,
-        )
+        fd._process_decision_result.assert_awaited_once()
+        # 冻结上下文应原样透传：按身份比对，不对消息列表做逐字段深比较
+        args = fd._process_decision_result.await_args.args
+        assert args[0] is decision
+        assert args[1] is recent
+        assert args[2] is historical
+        assert args[3:] == (2.0, event, event.unified_msg_origin)
 
 
 class TestSecretaryDispatchCompletion:
@@ -1691,17 +1648,24 @@ class TestSecretaryDispatchCompletion:
 
         await fd._call_secretary_and_execute(event, event.unified_msg_origin)
 
-        angel.debounce_manager.start_assistant_rest.assert_awaited_once_with(
-            event.unified_msg_origin,
-            config.waiting_time,
-            reason="assistant_invoked",
-        )
-        angel.debounce_manager.finish_secretary_dispatch.assert_awaited_once_with(
-            event.unified_msg_origin,
-            "dispatch-reply",
-            cooldown_seconds=0.0,
-            reason="reply_handoff",
-        )
+        # 两个 AsyncMock 都挂在 debounce_manager 下，一次断言同时覆盖参数与先后顺序
+        angel.debounce_manager.assert_has_calls(
+            [
+                call.start_assistant_rest(
+                    event.unified_msg_origin,
+                    config.waiting_time,
+                    reason="assistant_invoked",
+                ),
+                call.finish_secretary_dispatch(
+                    event.unified_msg_origin,
+                    "dispatch-reply",
+                    cooldown_seconds=0.0,
+                    reason="reply_handoff",
+                ),
+            ]
+        )
+        assert angel.debounce_manager.start_assistant_rest.await_count == 1
+        assert angel.debounce_manager.finish_secretary_dispatch.await_count == 1
         assert event.is_at_or_wake_command is True
         assert event.is_stopped() is False
 
@@ -0,0 +1,175 @@
+"""测试：ImageProcessor 下载图片并统一转为 JPEG Data URL"""
+
+import base64
+import importlib
+import io
+import sys
+import types
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from PIL import Image
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core import image_processor
+from core.image_processor import ImageProcessor
+
+
+def _make_image_bytes(mode="RGB", fmt="PNG", size=(32, 24)) -> bytes:
+    color = (120, 80, 40, 200) if mode == "RGBA" else (120, 80, 40)
+    img = Image.new(mode, size, color)
+    if fmt == "GIF":
+        img = img.convert("P")
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue()
+
+
+class _FakeResponse:
+    def __init__(self, status: int, body: bytes):
+        self.status = status
+        self._body = body
+
+    async def read(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    def __init__(self, status: int, body: bytes):
+        self.status = status
+        self.body = body
+        self.closed = False
+        self.get = MagicMock(side_effect=lambda url: _FakeResponse(self.status, self.body))
+
+    async def close(self):
+        self.closed = True
+
+
+async def _convert(processor: ImageProcessor, session: _FakeSession, url: str) -> str:
+    with patch.object(processor, "_get_session", AsyncMock(return_value=session)):
+        return await processor.convert_url_to_data_url(url)
+
+
+def _decode_data_url(data_url: str) -> Image.Image:
+    prefix = "data:image/jpeg;base64,"
+    assert data_url.startswith(prefix)
+    return Image.open(io.BytesIO(base64.b64decode(data_url[len(prefix):])))
+
+
+@pytest.mark.asyncio
+async def test_gif_converted_to_rgb_jpeg():
+    session = _FakeSession(200, _make_image_bytes(fmt="GIF"))
+
+    data_url = await _convert(ImageProcessor(), session, "http://example.com/a.gif")
+
+    img = _decode_data_url(data_url)
+    assert img.format == "JPEG"
+    assert img.mode == "RGB"
+    assert img.size == (32, 24)
+
+
+@pytest.mark.asyncio
+async def test_rgba_png_converted_to_jpeg():
+    session = _FakeSession(200, _make_image_bytes(mode="RGBA"))
+
+    img = _decode_data_url(await _convert(ImageProcessor(), session, "http://example.com/a.png"))
+
+    assert img.format == "JPEG"
+    assert img.mode == "RGB"
+
+
+@pytest.mark.asyncio
+async def test_jpeg_source_keeps_full_size():
+    """draft 仅允许按目标模式解码，不能把图片缩小。"""
+    session = _FakeSession(200, _make_image_bytes(fmt="JPEG", size=(64, 48)))
+
+    img = _decode_data_url(await _convert(ImageProcessor(), session, "http://example.com/a.jpg"))
+
+    assert img.size == (64, 48)
+
+
+@pytest.mark.asyncio
+async def test_non_image_payload_falls_back_to_raw_base64():
+    session = _FakeSession(200, b"not an image")
+
+    data_url = await _convert(ImageProcessor(), session, "http://example.com/broken")
+
+    assert data_url == "data:image/jpeg;base64," + base64.b64encode(b"not an image").decode()
+
+
+@pytest.mark.asyncio
+async def test_large_payload_base64_round_trips():
+    """1MB 原始数据走回退编码，结果须与标准库解码一致。"""
+    payload = bytes(range(256)) * 4096
+    session = _FakeSession(200, payload)
+
+    data_url = await _convert(ImageProcessor(), session, "http://example.com/blob")
+
+    encoded = data_url.removeprefix("data:image/jpeg;base64,")
+    assert base64.b64decode(encoded, validate=True) == payload
+
+
+def test_base64_backend_selected_by_import():
+    """装有 pybase64 时使用它，否则回退标准库；两个导入分支都实际执行一遍。"""
+    calls = []
+    fake = types.ModuleType("pybase64")
+
+    def fake_b64encode(data):
+        calls.append(len(data))
+        return base64.b64encode(data)
+
+    fake.b64encode = fake_b64encode
+    original = sys.modules.get("pybase64")
+    try:
+        sys.modules["pybase64"] = fake
+        module = importlib.reload(image_processor)
+        assert module._b64 is fake
+        assert module._b64.b64encode(b"abc") == b"YWJj"
+        assert calls == [3]
+
+        # sys.modules 中置 None 会让 import 抛 ImportError，走标准库回退
+        sys.modules["pybase64"] = None
+        module = importlib.reload(image_processor)
+        assert module._b64 is base64
+    finally:
+        if original is None:
+            sys.modules.pop("pybase64", None)
+        else:
+            sys.modules["pybase64"] = original
+        importlib.reload(image_processor)
+
+
+@pytest.mark.asyncio
+async def test_http_error_returns_empty():
+    session = _FakeSession(404, b"")
+
+    assert await _convert(ImageProcessor(), session, "http://example.com/missing") == ""
+
+
+@pytest.mark.asyncio
+async def test_session_is_shared_and_recreated_after_close():
+    processor = ImageProcessor()
+
+    with patch(
+        "core.image_processor.aiohttp.ClientSession",
+        side_effect=lambda **kwargs: _FakeSession(200, b""),
+    ) as session_cls:
+        first = await processor._get_session()
+        again = await processor._get_session()
+        await processor.close()
+        reopened = await processor._get_session()
+
+    assert first is again
+    assert first.closed
+    assert reopened is not first
+    assert session_cls.call_count == 2
@@ -119,6 +119,21 @@ def test_filter_images_keeps_images_when_modalities_are_unconfigured():
     assert filtered[0]["content"][1]["type"] == "image_url"
 
 
+def test_filter_images_for_text_provider_leaves_input_untouched():
+    front_desk = _front_desk(supports_image=False)
+    text_item = {"type": "text", "text": "看图"}
+    image_msg = {"role": "user", "content": [text_item, _image("file:///tmp/a.png")]}
+    plain_msg = {"role": "assistant", "content": [{"type": "text", "text": "好"}]}
+    contexts = [image_msg, plain_msg]
+
+    filtered = front_desk.filter_images_for_provider("chat", contexts)
+
+    assert filtered[0]["content"] == [text_item]
+    assert filtered[0] is not image_msg
+    assert len(image_msg["content"]) == 2
+    assert filtered[1] is plain_msg
+
+
 def test_ledger_does_not_caption_images_when_provider_modalities_are_unconfigured():
     ledger = object.__new__(ConversationLedger)
     ledger.get_context_snapshot = lambda chat_id: (
@@ -0,0 +1,53 @@
+"""测试：json_serialize_context 的旁路上下文序列化"""
+
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.utils.context_utils import json_serialize_context
+
+
+def test_chinese_emitted_as_utf8_without_whitespace():
+    records = [{"role": "user", "content": "日常问候", "timestamp": 1.5}]
+    decision = {"should_reply": True, "topic": "测试话题", "reply_strategy": "表示共情"}
+
+    payload = json_serialize_context(records, decision)
+
+    assert "日常问候" in payload and "测试话题" in payload
+    assert "\\u" not in payload
+    assert ", " not in payload and '": ' not in payload
+    assert json.loads(payload) == {"chat_records": records, "secretary_decision": decision}
+
+
+def test_needs_search_dropped_and_non_dict_records_skipped():
+    payload = json.loads(
+        json_serialize_context(
+            [{"role": "user", "content": "hi"}, "bad"],
+            {"should_reply": False, "needs_search": True},
+        )
+    )
+
+    assert payload["chat_records"] == [{"role": "user", "content": "hi"}]
+    assert "needs_search" not in payload["secretary_decision"]
+
+
+def test_real_secretary_decision_serialized_via_model_dump():
+    """用真实 SecretaryDecision 而非 spec mock：走 model_dump 分支并校验字段。"""
+    from models.analysis_result import SecretaryDecision
+
+    decision = SecretaryDecision(
+        should_reply=True,
+        reply_strategy="test_strategy",
+        topic="test_topic",
+        reply_target="user2",
+    )
+
+    payload = json.loads(json_serialize_context([], decision))
+
+    assert payload["secretary_decision"]["reply_target"] == "user2"
+    assert payload["secretary_decision"]["topic"] == "test_topic"
+    assert payload["secretary_decision"]["entities"] == []
@@ -5,7 +5,6 @@
 本地临时路径（不带 file:/// 前缀），_load_image_bytes 需要能直接读取这类路径。
 """
 
-import asyncio
 import struct
 import sys
 import tempfile
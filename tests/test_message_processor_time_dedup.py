@@ -31,3 +31,25 @@ def test_user_message_does_not_append_duplicate_time_text_block():
     assert "[群友: 红豆泥 (ID: 289104862)]" in text
     assert "fairy？有没有觉得提示词哪里不对？我继续修" in text
     assert text.count("2026-07-14 14:00") == 1
+
+
+def test_user_image_message_keeps_ledger_message_intact():
+    processor = MessageProcessor("fairy")
+    image_item = {"type": "image_url", "image_url": {"url": "https://example.com/a.png"}}
+    msg = {
+        "role": "user",
+        "content": [{"type": "text", "text": "看图"}, image_item],
+        "image_caption": "一只猫",
+        "sender_name": "红豆泥",
+        "sender_id": "289104862",
+        "timestamp": 1784008800,
+    }
+
+    processed = processor.process_message(msg)
+
+    assert msg["content"] == [{"type": "text", "text": "看图"}, image_item]
+    assert "一只猫" in processed["content"][0]["text"]
+    output_image = processed["content"][-1]
+    assert output_image == image_item
+    assert output_image is not image_item
+    assert output_image["image_url"] is not image_item["image_url"]
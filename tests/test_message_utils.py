@@ -0,0 +1,49 @@
+"""测试：message_utils 历史消息剪枝"""
+
+import sys
+from pathlib import Path
+from types import MappingProxyType
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.utils.message_utils import prune_old_messages
+
+# prune_old_messages 只读取历史消息的 timestamp：各用例共用一份只读历史
+DB_HISTORY = (
+    MappingProxyType({"timestamp": 100.0, "sender_name": "Alice", "content": "Hello"}),
+    MappingProxyType({"timestamp": 101.0, "sender_name": "Bob", "content": "Hi"}),
+)
+NEW_MESSAGE = MappingProxyType(
+    {"timestamp": 102.0, "sender_name": "Alice", "content": "新消息"}
+)
+NO_TIMESTAMP_MESSAGE = MappingProxyType({"content": "无时间戳"})
+
+
+def _canon(messages) -> tuple:
+    """把消息列表投影成元组，比较与失败差异都只看剪枝相关的字段。"""
+    return tuple(
+        (m.get("timestamp"), m.get("sender_name"), m.get("content")) for m in messages
+    )
+
+
+@pytest.mark.parametrize("cached,history,expected", [
+    # 已入库的消息被剪掉，只留新消息
+    ((*DB_HISTORY, NEW_MESSAGE), DB_HISTORY, (NEW_MESSAGE,)),
+    # 全部已入库
+    (DB_HISTORY, DB_HISTORY, ()),
+    # 空历史 / 空缓存
+    (DB_HISTORY[:1], (), DB_HISTORY[:1]),
+    ((), DB_HISTORY, ()),
+    # 历史缺时间戳的条目不参与去重，缓存里缺时间戳的消息保留
+    (
+        (NO_TIMESTAMP_MESSAGE, NEW_MESSAGE),
+        DB_HISTORY + (MappingProxyType({"content": "历史无时间戳"}),),
+        (NO_TIMESTAMP_MESSAGE, NEW_MESSAGE),
+    ),
+])
+def test_prune_old_messages(cached, history, expected):
+    assert _canon(prune_old_messages(list(cached), history)) == _canon(expected)
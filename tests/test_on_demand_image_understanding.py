@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-import asyncio
 import sys
-import threading
 from pathlib import Path
 from types import SimpleNamespace
 
+import pytest
+
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 if str(PROJECT_ROOT.parent) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT.parent))
@@ -13,11 +13,16 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from astrbot_plugin_angel_heart.core.conversation_ledger import ConversationLedger
+from astrbot_plugin_angel_heart.core.rw_lock import ReadWriteLock
+from astrbot_plugin_angel_heart.tools.image_understanding import AngelDescribeImageTool
+
+# 各异步用例互不共享状态、无真实 I/O：整个模块共用一个事件循环，不再逐条新建
+module_loop = pytest.mark.asyncio(loop_scope="module")
 
 
 def _ledger_with_image(chat_id: str, path: str) -> ConversationLedger:
     ledger = object.__new__(ConversationLedger)
-    ledger._lock = threading.Lock()
+    ledger._lock = ReadWriteLock()
     ledger._compression_locks = {}
     ledger._ledgers = {
         chat_id: {
@@ -37,7 +42,8 @@ def _ledger_with_image(chat_id: str, path: str) -> ConversationLedger:
     return ledger
 
 
-def test_describe_image_uses_requested_ledger_image_and_focus():
+@module_loop
+async def test_describe_image_uses_requested_ledger_image_and_focus():
     chat_id = "aiocqhttp:GroupMessage:10000"
     path = "file:///tmp/ledger-image.png"
     ledger = _ledger_with_image(chat_id, path)
@@ -55,14 +61,12 @@ def test_describe_image_uses_requested_ledger_image_and_focus():
     ledger._load_image_bytes = load_image_bytes
     ledger._build_caption_image_data_url = lambda _data: "data:image/webp;base64,TEST"
 
-    result = asyncio.run(
-        ledger.describe_image(
-            chat_id=chat_id,
-            path=path,
-            focus="读取右下角的报错文字",
-            caption_provider_id="vision",
-            astr_context=SimpleNamespace(get_provider_by_id=lambda _id: Provider()),
-        )
+    result = await ledger.describe_image(
+        chat_id=chat_id,
+        path=path,
+        focus="读取右下角的报错文字",
+        caption_provider_id="vision",
+        astr_context=SimpleNamespace(get_provider_by_id=lambda _id: Provider()),
     )
 
     assert result == "右下角文字是 ERROR 42"
@@ -81,58 +85,56 @@ def test_describe_image_uses_requested_ledger_image_and_focus():
     assert message["content"][1]["cache_path"] == path
 
 
-def test_describe_image_rejects_path_outside_current_ledger():
+@module_loop
+async def test_describe_image_rejects_path_outside_current_ledger():
     chat_id = "aiocqhttp:GroupMessage:10000"
     ledger = _ledger_with_image(chat_id, "file:///tmp/ledger-image.png")
 
-    result = asyncio.run(
-        ledger.describe_image(
-            chat_id=chat_id,
-            path="file:///tmp/not-in-ledger.png",
-            focus="读取文字",
-            caption_provider_id="vision",
-            astr_context=SimpleNamespace(get_provider_by_id=lambda _id: None),
-        )
+    result = await ledger.describe_image(
+        chat_id=chat_id,
+        path="file:///tmp/not-in-ledger.png",
+        focus="读取文字",
+        caption_provider_id="vision",
+        astr_context=SimpleNamespace(get_provider_by_id=lambda _id: None),
     )
 
     assert result == "图片理解被拒绝：path 不属于当前会话账本中的图片。"
 
 
-def test_describe_image_requires_configured_provider():
+@module_loop
+async def test_describe_image_requires_configured_provider():
     chat_id = "aiocqhttp:GroupMessage:10000"
     ledger = _ledger_with_image(chat_id, "file:///tmp/ledger-image.png")
 
-    result = asyncio.run(
-        ledger.describe_image(
-            chat_id=chat_id,
-            path="file:///tmp/ledger-image.png",
-            focus="读取文字",
-            caption_provider_id="",
-            astr_context=SimpleNamespace(get_provider_by_id=lambda _id: None),
-        )
+    result = await ledger.describe_image(
+        chat_id=chat_id,
+        path="file:///tmp/ledger-image.png",
+        focus="读取文字",
+        caption_provider_id="",
+        astr_context=SimpleNamespace(get_provider_by_id=lambda _id: None),
     )
 
     assert result == "图片理解不可用：未配置 image_caption_provider_id。"
 
 
-def test_describe_image_rejects_missing_provider():
+@module_loop
+async def test_describe_image_rejects_missing_provider():
     chat_id = "aiocqhttp:GroupMessage:10000"
     ledger = _ledger_with_image(chat_id, "file:///tmp/ledger-image.png")
 
-    result = asyncio.run(
-        ledger.describe_image(
-            chat_id=chat_id,
-            path="file:///tmp/ledger-image.png",
-            focus="读取文字",
-            caption_provider_id="vision",
-            astr_context=SimpleNamespace(get_provider_by_id=lambda _id: None),
-        )
+    result = await ledger.describe_image(
+        chat_id=chat_id,
+        path="file:///tmp/ledger-image.png",
+        focus="读取文字",
+        caption_provider_id="vision",
+        astr_context=SimpleNamespace(get_provider_by_id=lambda _id: None),
     )
 
     assert result == "图片理解不可用：找不到已配置的图片理解 Provider。"
 
 
-def test_describe_image_returns_provider_failure_as_tool_result():
+@module_loop
+async def test_describe_image_returns_provider_failure_as_tool_result():
     chat_id = "aiocqhttp:GroupMessage:10000"
     path = "file:///tmp/ledger-image.png"
     ledger = _ledger_with_image(chat_id, path)
@@ -147,16 +149,67 @@ def test_describe_image_returns_provider_failure_as_tool_result():
     ledger._load_image_bytes = load_image_bytes
     ledger._build_caption_image_data_url = lambda _data: "data:image/webp;base64,TEST"
 
-    result = asyncio.run(
-        ledger.describe_image(
-            chat_id=chat_id,
-            path=path,
-            focus="读取文字",
-            caption_provider_id="vision",
-            astr_context=SimpleNamespace(
-                get_provider_by_id=lambda _id: FailingProvider()
-            ),
-        )
+    result = await ledger.describe_image(
+        chat_id=chat_id,
+        path=path,
+        focus="读取文字",
+        caption_provider_id="vision",
+        astr_context=SimpleNamespace(
+            get_provider_by_id=lambda _id: FailingProvider()
+        ),
     )
 
     assert result == "图片理解失败：视觉 Provider 调用异常：upstream failed"
+
+
+def test_image_tool_keeps_registered_schema():
+    tool = AngelDescribeImageTool()
+
+    assert tool.name == "angel_describe_image"
+    assert tool.parameters == {
+        "type": "object",
+        "properties": {
+            "focus": {
+                "type": "string",
+                "description": "希望从图片中确认的具体内容，例如“读取右下角的报错文字”或“比较这张图中的两个数值”。",
+            },
+            "path": {
+                "type": "string",
+                "description": "当前会话 AngelHeart 上下文中显示的图片路径；只能使用其中已有的单张图片路径。",
+            },
+        }
+    }
+
+
+@module_loop
+async def test_image_tool_passes_current_event_dependencies_to_ledger():
+    calls = []
+
+    class Ledger:
+        async def describe_image(self, **kwargs):
+            calls.append(kwargs)
+            return "图片描述"
+
+    astr_context = object()
+    tool = AngelDescribeImageTool(
+        conversation_ledger=Ledger(),
+        config_manager=SimpleNamespace(image_caption_provider_id="vision"),
+        astr_context=astr_context,
+    )
+
+    result = await tool.run(
+        SimpleNamespace(unified_msg_origin="aiocqhttp:GroupMessage:10000"),
+        focus="读取右下角文字",
+        path="file:///tmp/ledger-image.png",
+    )
+
+    assert result == "图片描述"
+    assert calls == [
+        {
+            "chat_id": "aiocqhttp:GroupMessage:10000",
+            "focus": "读取右下角文字",
+            "path": "file:///tmp/ledger-image.png",
+            "caption_provider_id": "vision",
+            "astr_context": astr_context,
+        }
+    ]
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import sys
-import types
 from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock
@@ -12,43 +11,20 @@ _PARENT = str(PLUGIN_ROOT.parent)
 if _PARENT not in sys.path:
     sys.path.insert(0, _PARENT)
 
-for _mod_path in (
-    "astrbot",
-    "astrbot.api",
-    "astrbot.api.event",
-    "astrbot.core",
-    "astrbot.core.agent",
-    "astrbot.core.agent.message",
-    "astrbot.core.message",
-    "astrbot.core.message.components",
-    "astrbot.core.star",
-    "astrbot.core.star.context",
-):
-    sys.modules.setdefault(_mod_path, types.ModuleType(_mod_path))
-
-sys.modules["astrbot.api"].logger = MagicMock()
-sys.modules["astrbot.core.message.components"].Image = type("Image", (), {})
-sys.modules["astrbot.core.message.components"].At = type("At", (), {})
-sys.modules["astrbot.core.message.components"].File = type("File", (), {})
-sys.modules["astrbot.core.star.context"].Context = type("Context", (), {})
-sys.modules["astrbot.core.agent.message"].ImageURLPart = type(
-    "ImageURLPart",
-    (),
-    {"__init__": lambda self, image_url: setattr(self, "image_url", SimpleNamespace(**image_url))},
-)
-
 from astrbot_plugin_angel_heart.roles.front_desk import FrontDesk
 from astrbot_plugin_angel_heart.core.work_ledger import WorkLedger
 
 
 def _front_desk():
-    config = MagicMock()
-    config.for_chat.return_value = config
-    config.alias = "fairy"
-    config.image_caption_provider_id = ""
-    config.focus_instructions = "分析 总结 好好想想 为什么 到底"
-    config.normal_reply_max_chars = 20
-    config.focus_reply_max_chars = 200
+    # 纯属性桩：重写路径只读这些字段，无需 MagicMock 的子 mock 自动生成
+    config = SimpleNamespace(
+        alias="fairy",
+        image_caption_provider_id="",
+        focus_instructions="分析 总结 好好想想 为什么 到底",
+        normal_reply_max_chars=20,
+        focus_reply_max_chars=200,
+    )
+    config.for_chat = lambda chat_id: config
     angel = MagicMock()
     angel.work_ledger = WorkLedger()
     angel.astr_context = MagicMock()
@@ -0,0 +1,73 @@
+"""测试：ReadWriteLock 读者并行、写者独占"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.rw_lock import ReadWriteLock
+
+
+def test_readers_share_lock():
+    lock = ReadWriteLock()
+    inside = threading.Barrier(2, timeout=2)
+
+    def reader():
+        with lock.read():
+            # 两个读者必须能同时持有读锁，否则 Barrier 超时
+            inside.wait()
+
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not inside.broken
+
+
+def test_writer_excludes_readers():
+    lock = ReadWriteLock()
+
+    with lock.read():
+        assert lock.acquire(blocking=False) is False
+        assert lock.acquire(timeout=0.01) is False
+
+    with lock:
+        got_read = threading.Event()
+
+        def reader():
+            with lock.read():
+                got_read.set()
+
+        t = threading.Thread(target=reader)
+        t.start()
+        assert not got_read.wait(0.05)
+
+    t.join(timeout=2)
+    assert got_read.is_set()
+
+
+def test_waiting_writer_blocks_new_readers():
+    lock = ReadWriteLock()
+    order = []
+    lock.acquire_read()
+
+    writer = threading.Thread(target=lambda: (lock.acquire(), order.append("w"), lock.release()))
+    writer.start()
+    deadline = time.monotonic() + 2
+    while not lock._writers_waiting:
+        assert time.monotonic() < deadline, "写者未在 2s 内进入等待"
+        time.sleep(0.001)
+
+    reader = threading.Thread(target=lambda: (lock.acquire_read(), order.append("r"), lock.release_read()))
+    reader.start()
+    lock.release_read()
+
+    writer.join(timeout=2)
+    reader.join(timeout=2)
+    assert order == ["w", "r"]
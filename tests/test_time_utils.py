@@ -0,0 +1,24 @@
+"""测试：time_utils 相对时间分档"""
+
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.utils import time_utils
+
+
+def test_relative_time_buckets(monkeypatch):
+    monkeypatch.setattr(time_utils.time, "time", lambda: 1_000_000.0)
+    now = 1_000_000.0
+
+    assert time_utils.format_relative_time(now - 59.9) == " (刚刚)"
+    assert time_utils.format_relative_time(now - 60) == " (1分钟前)"
+    assert time_utils.format_relative_time(now - 3599) == " (59分钟前)"
+    assert time_utils.format_relative_time(now - 7200) == " (2小时前)"
+    assert time_utils.format_relative_time(int(now - 3 * 86400)) == " (3天前)"
+    assert time_utils.format_relative_time(str(now - 120)) == " (2分钟前)"
+    assert time_utils.format_relative_time(now + 10) == ""
+    assert time_utils.format_relative_time("bad") == ""
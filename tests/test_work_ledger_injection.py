@@ -3,8 +3,8 @@
 from __future__ import annotations
 
 import sys
-import types
 from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
 import pytest
@@ -15,20 +15,6 @@ _PARENT = str(PLUGIN_ROOT.parent)
 if _PARENT not in sys.path:
     sys.path.insert(0, _PARENT)
 
-for _mod_path in (
-    "astrbot",
-    "astrbot.api",
-    "astrbot.api.event",
-    "astrbot.core",
-    "astrbot.core.agent",
-    "astrbot.core.agent.message",
-    "astrbot.core.message",
-    "astrbot.core.message.components",
-):
-    sys.modules.setdefault(_mod_path, types.ModuleType(_mod_path))
-
-sys.modules["astrbot.api"].logger = MagicMock()
-
 from astrbot_plugin_angel_heart.core.work_ledger import WorkLedger
 from astrbot_plugin_angel_heart.core.llm_analyzer import LLMAnalyzer
 
@@ -105,6 +91,19 @@ class TestWorkLedgerFormat:
         assert recent[0].status == "done"
         assert recent[0].result_summary == "已回复"
 
+    def test_work_item_uses_slots(self):
+        wl = WorkLedger()
+        wl.start_work(
+            chat_id="g1",
+            work_id="w1",
+            trigger_message_id="m1",
+            trigger_summary="任务A",
+        )
+        item = wl.get_active_works("g1")[0]
+        assert not hasattr(item, "__dict__")
+        with pytest.raises(AttributeError):
+            item.unknown_field = 1
+
 
 class FakeClock:
     """可推进的假时钟，注入 WorkLedger(time_func=...) 构造超时状态。"""
@@ -222,11 +221,13 @@ class TestWorkLedgerLifecycle:
 
 class TestAnalyzerPromptInjection:
     def test_build_prompt_appends_work_ledger(self):
-        config = MagicMock()
-        config.for_chat.return_value = config
-        config.alias = "草王"
-        config.ai_self_identity = "测试身份"
-        config.reply_strategy_guide = "策略"
+        config = SimpleNamespace(
+            alias="草王",
+            ai_self_identity="测试身份",
+            reply_strategy_guide="策略",
+            is_reasoning_model=False,
+        )
+        config.for_chat = lambda chat_id: config
         analyzer = LLMAnalyzer("mock", MagicMock(), "策略", config)
         analyzer.base_prompt_template = (
             "BASE\n{historical_context}\n{recent_dialogue}\n"
@@ -0,0 +1,29 @@
+"""测试：format_message_to_text 的角色标签"""
+
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.utils.xml_formatter import format_message_to_text
+
+
+def test_system_message_uses_notice_label():
+    msg = {"role": "system", "content": "[当前摘要]\n摘要"}
+
+    assert format_message_to_text(msg) == "[系统通知]\n[当前摘要]\n摘要"
+
+
+def test_unknown_role_falls_back_to_role_name():
+    msg = {"role": "developer", "content": [{"type": "text", "text": "hi"}]}
+
+    assert format_message_to_text(msg) == "[developer]\nhi"
+
+
+def test_wrapper_tag_wraps_labelled_body():
+    msg = {"role": "system", "content": "通知"}
+
+    assert format_message_to_text(msg, wrapper_tag="历史") == "<历史>\n[系统通知]\n通知\n</历史>"
+